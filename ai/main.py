@@ -12,19 +12,23 @@ This service handles:
 import asyncio
 import logging
 import os
+import re
 import cv2
 import numpy as np
-import redis
-import json
+import onnx
+import orjson
+import redis.asyncio as aioredis
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 
 import torch
+from numba import njit, prange
 from ultralytics import YOLO
 import easyocr
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
@@ -33,11 +37,52 @@ REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 MODEL_PATH = os.getenv('MODEL_PATH', './models/yolov8n.pt')
 CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', '0.7'))
 MEDIA_DIR = Path(os.getenv('MEDIA_DIR', './media'))
+USE_TENSORRT = os.getenv('USE_TENSORRT', 'true').lower() == 'true'
+USE_ONNX = os.getenv('USE_ONNX', 'true').lower() == 'true'
+
+# Micro-batching of YOLO inference across concurrent requests
+YOLO_IMGSZ = int(os.getenv('YOLO_IMGSZ', '640'))
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '16'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '5'))
+
+# Common canvas that vehicle crops are letterboxed to for batched OCR
+OCR_WIDTH = int(os.getenv('OCR_WIDTH', '480'))
+OCR_HEIGHT = int(os.getenv('OCR_HEIGHT', '320'))
+# Indian plates only use uppercase Latin letters and digits
+PLATE_ALLOWLIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+# Indian license plate patterns: standard XX00XX0000 (and partial numbers) or flexible
+PLATE_CLEAN_RE = re.compile(r'[^A-Z0-9]')
+PLATE_RE = re.compile(r'^(?:[A-Z]{2}\d{2}[A-Z]{1,2}\d{1,4}|[A-Z]{1,2}\d{1,4}[A-Z]{0,2}\d{0,4})$')
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@njit(parallel=True, cache=True)
+def unsharp_mask_batch(batch: np.ndarray, out: np.ndarray, amount: float):
+    """Sharpen a (N, H, W) uint8 batch with a 3x3 box-blur unsharp mask, rows in parallel"""
+    count, height, width = batch.shape
+    
+    for row in prange(count * height):
+        i = row // height
+        y = row % height
+        y0 = max(y - 1, 0)
+        y1 = min(y + 1, height - 1)
+        
+        for x in range(width):
+            x0 = max(x - 1, 0)
+            x1 = min(x + 1, width - 1)
+            
+            total = 0
+            for yy in range(y0, y1 + 1):
+                for xx in range(x0, x1 + 1):
+                    total += batch[i, yy, xx]
+            blur = total / ((y1 - y0 + 1) * (x1 - x0 + 1))
+            
+            value = (1.0 + amount) * batch[i, y, x] - amount * blur
+            out[i, y, x] = np.uint8(min(max(value + 0.5, 0.0), 255.0))
+
 # Data classes
 @dataclass
 class DetectionResult:
@@ -68,10 +113,20 @@ class AIProcessor:
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         logger.info(f"Using device: {self.device}")
         
+        if self.device == 'cuda':
+            torch.backends.cudnn.benchmark = True
+            
+            # Reused staging buffers: batches are letterboxed straight into pinned memory
+            # and uploaded on a side stream instead of allocating per batch
+            self.copy_stream = torch.cuda.Stream()
+            self.pinned_batch = torch.empty(
+                (BATCH_SIZE, YOLO_IMGSZ, YOLO_IMGSZ, 3), dtype=torch.uint8, pin_memory=True
+            )
+            self.device_batch = torch.empty_like(self.pinned_batch, device=self.device)
+        
         # Load YOLO model
         try:
-            self.yolo_model = YOLO(MODEL_PATH)
-            self.yolo_model.to(self.device)
+            self.yolo_model = self.load_yolo_model()
             logger.info("YOLO model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
@@ -79,20 +134,20 @@ class AIProcessor:
         
         # Initialize OCR reader
         try:
-            self.ocr_reader = easyocr.Reader(['en'], gpu=torch.cuda.is_available())
+            self.ocr_reader = easyocr.Reader(
+                ['en'],
+                gpu=torch.cuda.is_available(),
+                recog_network='english_g2',
+                quantize=not torch.cuda.is_available(),
+                cudnn_benchmark=True
+            )
             logger.info("OCR reader initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize OCR reader: {e}")
             raise
         
-        # Redis connection
-        try:
-            self.redis_client = redis.from_url(REDIS_URL)
-            self.redis_client.ping()
-            logger.info("Redis connection established")
-        except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
-            raise
+        # Redis connection pool (async client, connectivity is checked in start())
+        self.redis_client = aioredis.from_url(REDIS_URL, max_connections=32)
         
         # Class mappings for Indian traffic scenarios
         self.vehicle_classes = {
@@ -116,52 +171,266 @@ class AIProcessor:
             'speeding': self.detect_speeding,
             'wrong_parking': self.detect_wrong_parking
         }
+        
+        # Object classes that must be present for a detector to be worth running
+        self.violation_requirements = {
+            'wrong_way': self.vehicle_classes,
+            'helmet_violation': {'motorcycle'},
+            'triple_riding': {'motorcycle'},
+            'mobile_usage': {'person'},
+            'seatbelt_violation': {'car', 'taxi', 'suv'},
+            'signal_jump': {'traffic light'},
+            'speeding': self.vehicle_classes,
+            'wrong_parking': self.vehicle_classes
+        }
+        
+        # OCR preprocessing (CLAHE object is reusable across calls)
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        
+        # Helmet color ranges in HSV, folded into per-channel lookup tables
+        helmet_color_ranges = [
+            ([0, 0, 0], [180, 255, 50]),      # Black
+            ([0, 0, 200], [180, 30, 255]),    # White
+            ([0, 50, 50], [10, 255, 255]),    # Red
+            ([100, 50, 50], [130, 255, 255]), # Blue
+            ([25, 50, 50], [35, 255, 255]),   # Yellow
+        ]
+        self.helmet_luts = self.build_range_luts(helmet_color_ranges)
+        
+        # Queue feeding the batched YOLO worker, created in start()
+        self._batch_queue = None
+        self._batch_task = None
 
-    async def process_image(self, image_path: str) -> AIAnalysisResult:
+    def load_yolo_model(self) -> YOLO:
+        """Load YOLO, preferring a cached TensorRT engine on CUDA and ONNX Runtime on CPU"""
+        if self.device == 'cuda' and USE_TENSORRT:
+            engine_path = Path(MODEL_PATH).with_suffix('.engine')
+            if not engine_path.exists():
+                # One-time build; the optimisation profile spans batch 1..BATCH_SIZE and is tuned for YOLO_IMGSZ
+                logger.info(f"Exporting TensorRT engine to {engine_path}")
+                YOLO(MODEL_PATH).export(
+                    format='engine',
+                    half=True,
+                    dynamic=True,
+                    batch=BATCH_SIZE,
+                    imgsz=YOLO_IMGSZ,
+                    workspace=4,
+                    device=0
+                )
+            return YOLO(str(engine_path), task='detect')
+        
+        if self.device == 'cpu' and USE_ONNX:
+            onnx_path = Path(MODEL_PATH).with_suffix('.onnx')
+            if not onnx_path.exists():
+                # dynamic=True makes batch, height and width dynamic; the batcher sends
+                # 1..BATCH_SIZE images, so keep the batch axis and pin the spatial axes
+                logger.info(f"Exporting ONNX model to {onnx_path}")
+                YOLO(MODEL_PATH).export(
+                    format='onnx',
+                    opset=17,
+                    dynamic=True,
+                    imgsz=YOLO_IMGSZ,
+                    simplify=True
+                )
+                self.pin_onnx_input_size(onnx_path, YOLO_IMGSZ)
+            return YOLO(str(onnx_path), task='detect')
+        
+        model = YOLO(MODEL_PATH)
+        model.to(self.device)
+        return model
+    
+    def pin_onnx_input_size(self, onnx_path: Path, imgsz: int):
+        """Fix the input height/width of an exported model to the letterbox size, leaving only the batch dynamic"""
+        model = onnx.load(str(onnx_path))
+        dims = model.graph.input[0].type.tensor_type.shape.dim
+        dims[2].dim_value = imgsz
+        dims[3].dim_value = imgsz
+        # Drop intermediate shapes recorded with symbolic height/width; ONNX Runtime re-infers them
+        del model.graph.value_info[:]
+        onnx.save(model, str(onnx_path))
+    
+    async def start(self):
+        """Connect to Redis, start the batching worker and warm up the models"""
+        try:
+            await self.redis_client.ping()
+            logger.info("Redis connection established")
+        except Exception as e:
+            logger.error(f"Failed to connect to Redis: {e}")
+            raise
+        
+        self._batch_queue = asyncio.Queue()
+        self._batch_task = asyncio.create_task(self._batch_worker())
+        
+        # Trigger JIT compilation of the OCR preprocessing kernel before the first request
+        await asyncio.to_thread(self.prepare_ocr_crops, np.zeros((64, 64), dtype=np.uint8), [])
+        
+        if self.device == 'cuda':
+            await asyncio.to_thread(self.warmup)
+    
+    def warmup(self):
+        """Run full-size dummy batches so cuDNN picks its kernels before real traffic"""
+        dummy = torch.zeros((BATCH_SIZE, 3, YOLO_IMGSZ, YOLO_IMGSZ), device=self.device)
+        self.yolo_model(dummy, verbose=False)
+        
+        dummy_crops = np.zeros((BATCH_SIZE, OCR_HEIGHT, OCR_WIDTH, 3), dtype=np.uint8)
+        self.ocr_reader.readtext_batched(
+            dummy_crops, n_width=OCR_WIDTH, n_height=OCR_HEIGHT, allowlist=PLATE_ALLOWLIST
+        )
+        logger.info("Model warmup completed")
+    
+    async def detect_objects(self, image: np.ndarray) -> List[DetectionResult]:
+        """Queue image for batched YOLO inference and wait for its detections"""
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((image, future))
+        return await future
+    
+    async def _batch_worker(self):
+        """Coalesce images arriving within a short window into one YOLO forward pass"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + BATCH_MAX_WAIT_MS / 1000
+            
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            images = [image for image, _ in batch]
+            try:
+                batch_detections = await asyncio.to_thread(self.run_yolo_batch, images)
+            except Exception as e:
+                logger.error(f"Batched YOLO inference failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), detections in zip(batch, batch_detections):
+                if not future.done():
+                    future.set_result(detections)
+    
+    def run_yolo_batch(self, images: List[np.ndarray]) -> List[List[DetectionResult]]:
+        """Letterbox images to a common size and run a single YOLO forward pass"""
+        if self.device == 'cuda':
+            batch = self.pinned_batch[:len(images)].numpy()
+        else:
+            batch = np.empty((len(images), YOLO_IMGSZ, YOLO_IMGSZ, 3), dtype=np.uint8)
+        letterbox_params = []
+        
+        for i, image in enumerate(images):
+            _, scale, pad = self.letterbox(image, (YOLO_IMGSZ, YOLO_IMGSZ), out=batch[i])
+            letterbox_params.append((scale, pad))
+        
+        tensor = self.upload_batch(batch)
+        yolo_results = self.yolo_model(tensor, conf=CONFIDENCE_THRESHOLD, verbose=False)
+        
+        return [
+            self.extract_detections(result, scale, pad, image.shape)
+            for result, (scale, pad), image in zip(yolo_results, letterbox_params, images)
+        ]
+    
+    def upload_batch(self, batch: np.ndarray) -> torch.Tensor:
+        """Convert (B,H,W,BGR) uint8 to the (B,RGB,H,W) float [0, 1] tensor YOLO expects"""
+        if self.device != 'cuda':
+            return torch.from_numpy(batch).permute(0, 3, 1, 2).flip(1).float().div_(255)
+        
+        count = len(batch)
+        with torch.cuda.stream(self.copy_stream):
+            device_batch = self.device_batch[:count]
+            device_batch.copy_(self.pinned_batch[:count], non_blocking=True)
+            tensor = device_batch.permute(0, 3, 1, 2).flip(1).float().div_(255)
+        
+        # Inference runs on the default stream, so order it after the upload
+        torch.cuda.current_stream().wait_stream(self.copy_stream)
+        tensor.record_stream(torch.cuda.current_stream())
+        return tensor
+    
+    def extract_detections(self, result, scale: float, pad: Tuple[int, int],
+                           image_shape: Tuple[int, ...]) -> List[DetectionResult]:
+        """Convert a YOLO result on a letterboxed input back to original image coordinates"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        
+        height, width = image_shape[:2]
+        pad_x, pad_y = pad
+        xyxy = boxes.xyxy.cpu().numpy()
+        xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - pad_x) / scale).clip(0, width)
+        xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - pad_y) / scale).clip(0, height)
+        
+        detections = []
+        for class_id, confidence, bbox in zip(boxes.cls.tolist(), boxes.conf.tolist(), xyxy.tolist()):
+            class_name = self.yolo_model.names[int(class_id)]
+            detections.append(DetectionResult(class_name, confidence, bbox))
+        
+        return detections
+    
+    def letterbox(self, image: np.ndarray, shape: Tuple[int, int],
+                  out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """Resize image into shape (h, w) keeping aspect ratio and padding the remainder"""
+        height, width = image.shape[:2]
+        target_h, target_w = shape
+        scale = min(target_h / height, target_w / width)
+        new_w = max(1, int(round(width * scale)))
+        new_h = max(1, int(round(height * scale)))
+        pad_x = (target_w - new_w) // 2
+        pad_y = (target_h - new_h) // 2
+        
+        if out is None:
+            out = np.full((target_h, target_w) + image.shape[2:], 114, dtype=image.dtype)
+        else:
+            out.fill(114)
+        
+        out[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+            image, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+        )
+        return out, scale, (pad_x, pad_y)
+
+    async def process_image(self, image: np.ndarray) -> AIAnalysisResult:
         """Process image for traffic violations and license plates"""
         start_time = datetime.now()
         
         try:
-            # Load and validate image
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError(f"Could not load image: {image_path}")
+            # Grayscale frame, converted once and shared by quality scoring and OCR
+            gray = await run_in_threadpool(cv2.cvtColor, image, cv2.COLOR_BGR2GRAY)
             
             # Calculate image quality score
-            quality_score = self.calculate_image_quality(image)
+            quality_score = await run_in_threadpool(self.calculate_image_quality, gray)
             
-            # YOLO detection
-            yolo_results = self.yolo_model(image, conf=CONFIDENCE_THRESHOLD)
+            # YOLO detection (batched with concurrent requests)
+            detections = await self.detect_objects(image)
             
-            # Extract detections
+            # Split detections by category
             vehicles = []
             persons = []
             traffic_signs = []
             
-            for result in yolo_results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        class_id = int(box.cls[0])
-                        class_name = self.yolo_model.names[class_id]
-                        confidence = float(box.conf[0])
-                        bbox = box.xyxy[0].tolist()
-                        
-                        detection = DetectionResult(class_name, confidence, bbox)
-                        
-                        if class_name in self.vehicle_classes:
-                            vehicles.append(detection)
-                        elif class_name == 'person':
-                            persons.append(detection)
-                        elif class_name in self.traffic_sign_classes:
-                            traffic_signs.append(detection)
+            for detection in detections:
+                if detection.class_name in self.vehicle_classes:
+                    vehicles.append(detection)
+                elif detection.class_name == 'person':
+                    persons.append(detection)
+                elif detection.class_name in self.traffic_sign_classes:
+                    traffic_signs.append(detection)
             
             # License plate detection and OCR
-            license_plates = await self.detect_license_plates(image, vehicles)
+            license_plates = await self.detect_license_plates(gray, vehicles)
+            
+            # Box centers shared by all proximity checks
+            vehicle_centers = self.bbox_centers(vehicles)
+            person_centers = self.bbox_centers(persons)
             
             # Violation detection
+            present_classes = {detection.class_name for detection in detections}
             violations_detected = await self.detect_violations(
-                image, vehicles, persons, traffic_signs
+                image, vehicles, persons, traffic_signs, vehicle_centers, person_centers,
+                present_classes
             )
             
             processing_time = (datetime.now() - start_time).total_seconds()
@@ -181,84 +450,96 @@ class AIProcessor:
             return result
             
         except Exception as e:
-            logger.error(f"Error processing image {image_path}: {e}")
+            logger.error(f"Error processing image: {e}")
             raise
     
-    async def detect_license_plates(self, image: np.ndarray, vehicles: List[DetectionResult]) -> List[LicensePlateResult]:
-        """Detect and read license plates from vehicles"""
+    async def detect_license_plates(self, gray: np.ndarray, vehicles: List[DetectionResult]) -> List[LicensePlateResult]:
+        """Detect and read license plates from vehicles in the grayscale frame"""
         license_plates = []
         
+        # Crop preprocessing and OCR are blocking, keep them off the event loop
+        crops, crop_params = await run_in_threadpool(self.prepare_ocr_crops, gray, vehicles)
+        if not crops:
+            return license_plates
+        
+        # OCR detection for all vehicles in a single batched call
+        try:
+            results_list = await run_in_threadpool(
+                self.ocr_reader.readtext_batched,
+                crops, n_width=OCR_WIDTH, n_height=OCR_HEIGHT, allowlist=PLATE_ALLOWLIST
+            )
+        except Exception as e:
+            logger.warning(f"Error detecting license plates: {e}")
+            return license_plates
+        
+        for ocr_results, (x1, y1, scale, pad) in zip(results_list, crop_params):
+            for (bbox, text, confidence) in ocr_results:
+                # Filter for license plate patterns
+                if self.is_license_plate_text(text) and confidence > 0.5:
+                    # Convert canvas bbox to absolute image coordinates
+                    abs_bbox = self.relative_to_absolute_bbox(bbox, x1, y1, scale, pad)
+                    
+                    license_plate = LicensePlateResult(
+                        text=self.clean_license_plate_text(text),
+                        confidence=float(confidence),
+                        bbox=abs_bbox
+                    )
+                    license_plates.append(license_plate)
+        
+        return license_plates
+    
+    def prepare_ocr_crops(self, gray: np.ndarray,
+                          vehicles: List[DetectionResult]) -> Tuple[List[np.ndarray], List[Tuple]]:
+        """Enhance vehicle crops into one fixed-size batch on the common OCR canvas"""
+        batch = np.empty((len(vehicles), OCR_HEIGHT, OCR_WIDTH), dtype=np.uint8)
+        crop_params = []
+        
         for vehicle in vehicles:
             try:
                 # Extract vehicle region
                 x1, y1, x2, y2 = [int(coord) for coord in vehicle.bbox]
-                vehicle_region = image[y1:y2, x1:x2]
+                vehicle_region = gray[y1:y2, x1:x2]
+                if vehicle_region.size == 0:
+                    continue
                 
-                # Enhance image for better OCR
+                # Enhance crop and letterbox it straight into its batch slot
                 enhanced = self.enhance_for_ocr(vehicle_region)
+                _, scale, pad = self.letterbox(
+                    enhanced, (OCR_HEIGHT, OCR_WIDTH), out=batch[len(crop_params)]
+                )
+                crop_params.append((x1, y1, scale, pad))
                 
-                # OCR detection
-                ocr_results = self.ocr_reader.readtext(enhanced)
-                
-                for (bbox, text, confidence) in ocr_results:
-                    # Filter for license plate patterns
-                    if self.is_license_plate_text(text) and confidence > 0.5:
-                        # Convert relative bbox to absolute coordinates
-                        abs_bbox = self.relative_to_absolute_bbox(bbox, x1, y1)
-                        
-                        license_plate = LicensePlateResult(
-                            text=self.clean_license_plate_text(text),
-                            confidence=confidence,
-                            bbox=abs_bbox
-                        )
-                        license_plates.append(license_plate)
-                        
             except Exception as e:
-                logger.warning(f"Error detecting license plate in vehicle: {e}")
+                logger.warning(f"Error preparing vehicle crop for OCR: {e}")
                 continue
         
-        return license_plates
-    
-    def enhance_for_ocr(self, image: np.ndarray) -> np.ndarray:
-        """Enhance image quality for better OCR results"""
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # Sharpen every crop in a single parallel pass
+        batch = batch[:len(crop_params)]
+        sharpened = np.empty_like(batch)
+        unsharp_mask_batch(batch, sharpened, 0.5)
         
-        # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
+        return list(sharpened), crop_params
+    
+    def enhance_for_ocr(self, gray: np.ndarray) -> np.ndarray:
+        """Enhance grayscale crop for better OCR results (sharpening is done batch-wide)"""
+        # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization); this is the
+        # only new buffer, denoising writes back into it so the frame stays untouched
+        enhanced = self.clahe.apply(gray)
         
         # Denoise
-        denoised = cv2.medianBlur(enhanced, 3)
-        
-        # Sharpen
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(denoised, -1, kernel)
+        cv2.medianBlur(enhanced, 3, dst=enhanced)
         
-        return sharpened
+        return enhanced
     
     def is_license_plate_text(self, text: str) -> bool:
         """Check if text matches Indian license plate patterns"""
-        import re
-        
-        # Clean text
-        text = re.sub(r'[^A-Z0-9]', '', text.upper())
-        
-        # Indian license plate patterns
-        patterns = [
-            r'^[A-Z]{2}\d{2}[A-Z]{1,2}\d{4}$',  # Standard format: XX00XX0000
-            r'^[A-Z]{2}\d{2}[A-Z]{1,2}\d{1,4}$',  # Partial numbers
-            r'^[A-Z]{1,2}\d{1,4}[A-Z]{0,2}\d{0,4}$'  # Flexible pattern
-        ]
-        
-        return any(re.match(pattern, text) for pattern in patterns) and len(text) >= 6
+        text = PLATE_CLEAN_RE.sub('', text.upper())
+        return len(text) >= 6 and PLATE_RE.match(text) is not None
     
     def clean_license_plate_text(self, text: str) -> str:
         """Clean and format license plate text"""
-        import re
-        
         # Remove special characters and spaces
-        cleaned = re.sub(r'[^A-Z0-9]', '', text.upper())
+        cleaned = PLATE_CLEAN_RE.sub('', text.upper())
         
         # Add standard formatting
         if len(cleaned) >= 10:
@@ -267,34 +548,39 @@ class AIProcessor:
         
         return cleaned
     
-    def relative_to_absolute_bbox(self, relative_bbox: List, offset_x: int, offset_y: int) -> List[float]:
+    def relative_to_absolute_bbox(self, relative_bbox: List, offset_x: int, offset_y: int,
+                                  scale: float = 1.0, pad: Tuple[int, int] = (0, 0)) -> List[float]:
         """Convert relative bounding box to absolute coordinates"""
         # EasyOCR returns bbox as [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-        x_coords = [point[0] for point in relative_bbox]
-        y_coords = [point[1] for point in relative_bbox]
+        # on the letterboxed canvas, so undo the padding and scaling first
+        pad_x, pad_y = pad
+        x_coords = [(point[0] - pad_x) / scale for point in relative_bbox]
+        y_coords = [(point[1] - pad_y) / scale for point in relative_bbox]
         
         return [
-            min(x_coords) + offset_x,
-            min(y_coords) + offset_y,
-            max(x_coords) + offset_x,
-            max(y_coords) + offset_y
+            float(min(x_coords) + offset_x),
+            float(min(y_coords) + offset_y),
+            float(max(x_coords) + offset_x),
+            float(max(y_coords) + offset_y)
         ]
     
-    def calculate_image_quality(self, image: np.ndarray) -> float:
-        """Calculate image quality score based on various metrics"""
-        # Convert to grayscale for analysis
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Calculate sharpness using Laplacian variance
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    def calculate_image_quality(self, gray: np.ndarray) -> float:
+        """Calculate image quality score of a grayscale frame based on various metrics"""
+        # Calculate sharpness using Laplacian variance (int16 holds a uint8 Laplacian exactly)
+        laplacian = cv2.Laplacian(gray, cv2.CV_16S)
+        _, laplacian_std = cv2.meanStdDev(laplacian)
+        laplacian_var = float(laplacian_std[0, 0]) ** 2
         sharpness_score = min(laplacian_var / 1000, 1.0)  # Normalize
         
+        # Brightness and contrast from a single mean/std pass
+        mean, std = cv2.meanStdDev(gray)
+        
         # Calculate brightness
-        brightness = np.mean(gray) / 255
+        brightness = float(mean[0, 0]) / 255
         brightness_score = 1.0 - abs(brightness - 0.5) * 2  # Optimal at 0.5
         
         # Calculate contrast
-        contrast = gray.std() / 255
+        contrast = float(std[0, 0]) / 255
         contrast_score = min(contrast * 2, 1.0)  # Normalize
         
         # Combined quality score
@@ -303,31 +589,49 @@ class AIProcessor:
         return round(quality_score, 2)
     
     async def detect_violations(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                               persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> List[str]:
+                               persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                               vehicle_centers: np.ndarray, person_centers: np.ndarray,
+                               present_classes: set) -> List[str]:
         """Detect traffic violations in the image"""
         violations = []
+        violation_types = []
+        detectors = []
         
         for violation_type, detector in self.violation_patterns.items():
-            try:
-                if await detector(image, vehicles, persons, traffic_signs):
-                    violations.append(violation_type)
-            except Exception as e:
-                logger.warning(f"Error in {violation_type} detection: {e}")
+            # Skip detectors whose required objects are not in the frame
+            required = self.violation_requirements.get(violation_type)
+            if required and required.isdisjoint(present_classes):
+                continue
+            
+            violation_types.append(violation_type)
+            detectors.append(detector(image, vehicles, persons, traffic_signs,
+                                      vehicle_centers, person_centers))
+        
+        results = await asyncio.gather(*detectors, return_exceptions=True)
+        
+        for violation_type, detected in zip(violation_types, results):
+            if isinstance(detected, Exception):
+                logger.warning(f"Error in {violation_type} detection: {detected}")
+            elif detected:
+                violations.append(violation_type)
         
         return violations
     
     # Violation detection methods
     async def detect_helmet_violation(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                     persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                     persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                     vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect riders without helmets on motorcycles"""
-        motorcycles = [v for v in vehicles if 'motorcycle' in v.class_name.lower()]
-        
-        for motorcycle in motorcycles:
+        for i, vehicle in enumerate(vehicles):
+            if 'motorcycle' not in vehicle.class_name.lower():
+                continue
+            
             # Find persons near the motorcycle
-            nearby_persons = self.find_nearby_objects(motorcycle, persons, threshold=50)
+            nearby_persons = self.find_nearby_objects(vehicle_centers[i], person_centers, threshold=50)
             
             # Check if any person appears to be without helmet
-            for person in nearby_persons:
+            for person_index in nearby_persons:
+                person = persons[person_index]
                 # Use head detection and helmet classification
                 # This is a simplified version - in production, use a trained helmet detection model
                 x1, y1, x2, y2 = [int(coord) for coord in person.bbox]
@@ -346,13 +650,15 @@ class AIProcessor:
         return False
     
     async def detect_triple_riding(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                  persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                  persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                  vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect more than 2 people on a motorcycle"""
-        motorcycles = [v for v in vehicles if 'motorcycle' in v.class_name.lower()]
-        
-        for motorcycle in motorcycles:
+        for i, vehicle in enumerate(vehicles):
+            if 'motorcycle' not in vehicle.class_name.lower():
+                continue
+            
             # Count persons on/near the motorcycle
-            nearby_persons = self.find_nearby_objects(motorcycle, persons, threshold=30)
+            nearby_persons = self.find_nearby_objects(vehicle_centers[i], person_centers, threshold=30)
             
             if len(nearby_persons) > 2:
                 return True
@@ -360,21 +666,24 @@ class AIProcessor:
         return False
     
     async def detect_wrong_way_driving(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                      persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                      persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                      vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect vehicles going in wrong direction"""
         # This requires more sophisticated analysis of traffic flow
         # For now, return False - implement based on lane detection and traffic flow analysis
         return False
     
     async def detect_mobile_usage(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                 persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                 persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                 vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect mobile phone usage while driving"""
         # This requires facial analysis and hand gesture recognition
         # Placeholder implementation
         return False
     
     async def detect_seatbelt_violation(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                       persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                       persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                       vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect seatbelt violations in cars"""
         cars = [v for v in vehicles if v.class_name.lower() in ['car', 'taxi', 'suv']]
         
@@ -387,7 +696,8 @@ class AIProcessor:
         return False
     
     async def detect_signal_jump(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect vehicles crossing red traffic lights"""
         traffic_lights = [t for t in traffic_signs if 'traffic light' in t.class_name.lower()]
         
@@ -396,40 +706,45 @@ class AIProcessor:
         return False
     
     async def detect_speeding(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                             persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                             persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                             vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect speeding violations"""
         # Requires motion analysis from video or speed limit sign detection
         return False
     
     async def detect_wrong_parking(self, image: np.ndarray, vehicles: List[DetectionResult], 
-                                  persons: List[DetectionResult], traffic_signs: List[DetectionResult]) -> bool:
+                                  persons: List[DetectionResult], traffic_signs: List[DetectionResult],
+                                  vehicle_centers: np.ndarray, person_centers: np.ndarray) -> bool:
         """Detect wrong parking violations"""
         # Analyze parking zones and vehicle positions
         return False
     
-    def find_nearby_objects(self, reference_obj: DetectionResult, objects: List[DetectionResult], 
-                           threshold: int = 50) -> List[DetectionResult]:
-        """Find objects near a reference object"""
-        ref_center = self.get_bbox_center(reference_obj.bbox)
-        nearby = []
-        
-        for obj in objects:
-            obj_center = self.get_bbox_center(obj.bbox)
-            distance = self.calculate_distance(ref_center, obj_center)
-            
-            if distance <= threshold:
-                nearby.append(obj)
-        
-        return nearby
+    def find_nearby_objects(self, ref_center: np.ndarray, centers: np.ndarray,
+                           threshold: float = 50) -> np.ndarray:
+        """Return indices of centers within threshold of a reference center"""
+        # Compare squared distances in one vectorized pass, no sqrt needed
+        d2 = ((centers - ref_center) ** 2).sum(axis=1)
+        return np.flatnonzero(d2 <= threshold * threshold)
     
-    def get_bbox_center(self, bbox: List[float]) -> Tuple[float, float]:
-        """Get center point of bounding box"""
-        x1, y1, x2, y2 = bbox
-        return ((x1 + x2) / 2, (y1 + y2) / 2)
+    def bbox_centers(self, detections: List[DetectionResult]) -> np.ndarray:
+        """Get center points of detection bounding boxes as an (N, 2) array"""
+        if not detections:
+            return np.empty((0, 2), dtype=np.float32)
+        
+        boxes = np.array([d.bbox for d in detections], dtype=np.float32)
+        return (boxes[:, :2] + boxes[:, 2:]) * 0.5
     
-    def calculate_distance(self, point1: Tuple[float, float], point2: Tuple[float, float]) -> float:
-        """Calculate Euclidean distance between two points"""
-        return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+    def build_range_luts(self, ranges: List[Tuple[List[int], List[int]]]) -> np.ndarray:
+        """Build (3, 256) channel lookup tables where bit i marks values inside range i"""
+        luts = np.zeros((3, 256), dtype=np.uint8)
+        values = np.arange(256)
+        
+        for bit, (lower, upper) in enumerate(ranges):
+            for channel in range(3):
+                inside = (values >= lower[channel]) & (values <= upper[channel])
+                luts[channel, inside] |= np.uint8(1 << bit)
+        
+        return luts
     
     def analyze_helmet_presence(self, head_region: np.ndarray) -> bool:
         """Analyze if helmet is present in head region"""
@@ -441,37 +756,15 @@ class AIProcessor:
         
         # Convert to HSV for better color analysis
         hsv = cv2.cvtColor(head_region, cv2.COLOR_BGR2HSV)
+        h, s, v = cv2.split(hsv)
         
-        # Define helmet color ranges (black, white, bright colors)
-        helmet_masks = []
-        
-        # Black helmet
-        lower_black = np.array([0, 0, 0])
-        upper_black = np.array([180, 255, 50])
-        helmet_masks.append(cv2.inRange(hsv, lower_black, upper_black))
-        
-        # White helmet
-        lower_white = np.array([0, 0, 200])
-        upper_white = np.array([180, 30, 255])
-        helmet_masks.append(cv2.inRange(hsv, lower_white, upper_white))
-        
-        # Bright colored helmets
-        bright_colors = [
-            ([0, 50, 50], [10, 255, 255]),    # Red
-            ([100, 50, 50], [130, 255, 255]), # Blue
-            ([25, 50, 50], [35, 255, 255]),   # Yellow
-        ]
-        
-        for lower, upper in bright_colors:
-            helmet_masks.append(cv2.inRange(hsv, np.array(lower), np.array(upper)))
-        
-        # Combine all masks
-        combined_mask = np.zeros_like(helmet_masks[0])
-        for mask in helmet_masks:
-            combined_mask = cv2.bitwise_or(combined_mask, mask)
+        # A pixel is helmet-colored when one range matches all three channels,
+        # i.e. the AND of the per-channel range bitmasks is non-zero
+        lut_h, lut_s, lut_v = self.helmet_luts
+        combined_mask = lut_h[h] & lut_s[s] & lut_v[v]
         
         # Calculate helmet coverage
-        helmet_coverage = np.sum(combined_mask > 0) / combined_mask.size
+        helmet_coverage = np.count_nonzero(combined_mask) / combined_mask.size
         
         # Threshold for helmet presence
         return helmet_coverage > 0.3  # 30% coverage indicates helmet
@@ -494,6 +787,7 @@ ai_processor = None
 async def startup_event():
     global ai_processor
     ai_processor = AIProcessor()
+    await ai_processor.start()
     logger.info("AI Service started successfully")
 
 @app.get("/health/")
@@ -513,16 +807,18 @@ async def process_violation_image(
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Save uploaded file
-        MEDIA_DIR.mkdir(exist_ok=True)
-        file_path = MEDIA_DIR / f"{violation_id}_{file.filename}"
+        # Decode the upload in memory instead of round-tripping through disk
+        content = await file.read()
+        image = await run_in_threadpool(decode_image, content)
+        if image is None:
+            raise ValueError("Could not decode uploaded image")
         
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Persist the upload after the response is sent
+        file_path = MEDIA_DIR / f"{violation_id}_{file.filename}"
+        background_tasks.add_task(save_upload, file_path, content)
         
         # Process image
-        result = await ai_processor.process_image(str(file_path))
+        result = await ai_processor.process_image(image)
         
         # Store result in Redis if violation_id provided
         if violation_id:
@@ -540,13 +836,26 @@ async def process_violation_image(
         logger.error(f"Error processing image: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def decode_image(content: bytes) -> Optional[np.ndarray]:
+    """Decode uploaded image bytes into a BGR array"""
+    return cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR)
+
+def save_upload(file_path: Path, content: bytes):
+    """Write uploaded image to the media directory"""
+    try:
+        MEDIA_DIR.mkdir(exist_ok=True)
+        with open(file_path, "wb") as buffer:
+            buffer.write(content)
+    except Exception as e:
+        logger.error(f"Error saving upload {file_path}: {e}")
+
 @app.get("/result/{violation_id}")
 async def get_ai_result(violation_id: str):
     """Get AI processing result for a violation"""
     try:
-        result = ai_processor.redis_client.get(f"ai_result:{violation_id}")
+        result = await ai_processor.redis_client.get(f"ai_result:{violation_id}")
         if result:
-            return {"success": True, "result": json.loads(result)}
+            return {"success": True, "result": orjson.loads(result)}
         else:
             raise HTTPException(status_code=404, detail="Result not found")
     except Exception as e:
@@ -556,20 +865,26 @@ async def get_ai_result(violation_id: str):
 async def store_ai_result(violation_id: str, result: dict):
     """Store AI result in Redis"""
     try:
-        ai_processor.redis_client.setex(
+        await ai_processor.redis_client.setex(
             f"ai_result:{violation_id}",
             3600,  # 1 hour TTL
-            json.dumps(result)
+            orjson.dumps(result)
         )
         logger.info(f"AI result stored for violation {violation_id}")
     except Exception as e:
         logger.error(f"Error storing AI result: {e}")
 
 if __name__ == "__main__":
+    # Every worker loads its own models: on GPU keep a single process and let the
+    # batcher fill the device, on CPU spread requests across processes
+    default_workers = 1 if torch.cuda.is_available() else max(2, (os.cpu_count() or 2) // 2)
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=False,
-        workers=1
+        workers=int(os.getenv('WORKERS', default_workers)),
+        loop="uvloop",
+        http="httptools"
     )
@@ -0,0 +1,142 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict, namedtuple
+from django.db import close_old_connections
+from .models import AuditLog, OTPVerification
+
+logger = logging.getLogger(__name__)
+
+# Audit rows (AuditLog, issued OTPs and their verification) are never read on the request path, so
+# they are buffered in-process and written by a background thread in batches, in queue order
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL = 0.5  # seconds
+
+# Flushes a verified-OTP event is retried for while its issue record may still be
+# buffered by another worker (about AUDIT_FLUSH_INTERVAL apart)
+OTP_VERIFIED_RETRIES = 10
+
+OTPVerified = namedtuple('OTPVerified', ['phone_number', 'purpose', 'verified_at', 'retries_left'])
+
+_audit_queue = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+
+def log_action(**fields):
+    """
+    Queue an AuditLog entry for a batched insert
+    """
+    _enqueue(AuditLog(**fields))
+
+
+def log_otp_issued(phone_number, purpose, expires_at):
+    """
+    Queue an OTPVerification record of an issued OTP for a batched insert
+    """
+    # The code itself only lives in the cache (see otp.py)
+    _enqueue(OTPVerification(phone_number=phone_number, purpose=purpose, expires_at=expires_at))
+
+
+def log_otp_verified(phone_number, purpose, verified_at):
+    """
+    Queue marking an issued OTP's record verified, applied after the record itself is written
+    """
+    _enqueue(OTPVerified(phone_number, purpose, verified_at, OTP_VERIFIED_RETRIES))
+
+
+def flush_audit_logs():
+    """
+    Write every queued entry synchronously
+    """
+    batch = []
+    while True:
+        try:
+            batch.append(_audit_queue.get_nowait())
+        except queue.Empty:
+            break
+    
+    if batch:
+        _write_batch(batch)
+
+
+def _enqueue(entry):
+    _ensure_writer()
+    _audit_queue.put(entry)
+
+
+def _ensure_writer():
+    global _writer_thread
+    
+    # Threads don't survive a fork, so a pre-fork writer is restarted in the worker
+    if _writer_thread is not None and _writer_thread.is_alive():
+        return
+    
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(
+                target=_writer_loop, name='audit-log-writer', daemon=True
+            )
+            _writer_thread.start()
+
+
+def _drain_batch():
+    """
+    Block for the first entry, then collect up to a full batch within the flush interval
+    """
+    batch = [_audit_queue.get()]
+    deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+    
+    while len(batch) < AUDIT_BATCH_SIZE:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(_audit_queue.get(timeout=timeout))
+        except queue.Empty:
+            break
+    
+    return batch
+
+
+def _writer_loop():
+    while True:
+        _write_batch(_drain_batch())
+
+
+def _write_batch(batch):
+    by_model = defaultdict(list)
+    verified = []
+    for entry in batch:
+        if isinstance(entry, OTPVerified):
+            verified.append(entry)
+        else:
+            by_model[type(entry)].append(entry)
+    
+    close_old_connections()
+    for model, entries in by_model.items():
+        try:
+            model.objects.bulk_create(entries, batch_size=AUDIT_BATCH_SIZE)
+        except Exception:
+            logger.exception("Failed to write %d %s entries", len(entries), model.__name__)
+    
+    # After the inserts, so an OTP issued and verified within one batch is found
+    for event in verified:
+        try:
+            found = OTPVerification.mark_verified(event.phone_number, event.purpose, event.verified_at)
+        except Exception:
+            logger.exception("Failed to mark a %s OTP verified", event.purpose)
+            continue
+        
+        if found:
+            continue
+        if event.retries_left:
+            # The issue record may still be queued in another worker
+            _audit_queue.put(event._replace(retries_left=event.retries_left - 1))
+        else:
+            logger.warning("No issued %s OTP record to mark verified", event.purpose)
+
+
+atexit.register(flush_audit_logs)
@@ -0,0 +1,44 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from django.core.cache import cache
+from .models import CustomUser
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the token's user from the cache before the database
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        
+        entry = cache.get(CustomUser.cache_key(user_id))
+        if entry is None:
+            user = super().get_user(validated_token)
+            user.prime_cache()
+        else:
+            user = self.get_cached_user(validated_token, entry)
+        
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        
+        return user
+    
+    def get_cached_user(self, validated_token, entry):
+        """
+        Apply JWTAuthentication.get_user's checks to a cached identity entry
+        """
+        if not entry['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry['password_md5']:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        
+        return CustomUser.from_cache(entry)
@@ -1,9 +1,27 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F, Q, Subquery
+from django.db.models.fields.json import KeyTransform
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
+from rest_framework_simplejwt.utils import get_md5_hash_password
 import hashlib
+import hmac
+import json
+import orjson
 import secrets
 
+# PBKDF2-HMAC-SHA256 work factor for Aadhaar hashes
+AADHAAR_HASH_ITERATIONS = 200_000
+
+# Lifetime of the cached user behind JWT authentication
+USER_CACHE_TTL = 300  # seconds
+
+# Columns kept in the JWT user cache; the rest of the row loads from the database on access
+USER_CACHE_FIELDS = ('id', 'role', 'is_active', 'is_staff')
+
 
 class CustomUser(AbstractUser):
     """
@@ -55,16 +73,60 @@ class CustomUser(AbstractUser):
         db_table = 'auth_custom_user'
         indexes = [
             models.Index(fields=['phone_number']),
-            models.Index(fields=['aadhaar_hash']),
-            models.Index(fields=['role']),
+            # Partial indexes: most users have no Aadhaar hash, are citizens,
+            # and only pending KYC rows are scanned by the KYC worker
+            models.Index(
+                fields=['aadhaar_hash'],
+                name='idx_user_aadhaar_nn',
+                condition=Q(aadhaar_hash__isnull=False)
+            ),
+            models.Index(
+                fields=['kyc_status'],
+                name='idx_user_kyc_pending',
+                condition=Q(kyc_status='pending')
+            ),
+            models.Index(
+                fields=['role'],
+                name='idx_user_staff_role',
+                condition=~Q(role='citizen')
+            ),
         ]
     
+    @staticmethod
+    def cache_key(user_id):
+        """Cache key of the user looked up during JWT authentication"""
+        return f"jwt_user:{user_id}"
+    
+    def prime_cache(self):
+        """Store the identity columns JWT authentication needs (never the password or Aadhaar hash)"""
+        entry = {name: getattr(self, name) for name in USER_CACHE_FIELDS}
+        # Digest the token's revoke claim is compared with, as in JWTAuthentication.get_user
+        entry['password_md5'] = get_md5_hash_password(self.password)
+        cache.set(self.cache_key(self.pk), entry, USER_CACHE_TTL)
+    
+    @classmethod
+    def from_cache(cls, entry):
+        """User built from a cached identity entry, with every other column deferred"""
+        # from_db() takes values in model field order
+        names = [f.attname for f in cls._meta.concrete_fields if f.attname in USER_CACHE_FIELDS]
+        return cls.from_db(cls.objects.db, names, [entry[name] for name in names])
+    
+    def load_deferred_fields(self):
+        """Load every column left out of a cached user in one query"""
+        deferred = self.get_deferred_fields()
+        if deferred:
+            self.refresh_from_db(fields=deferred)
+        return self
+    
+    def invalidate_cache(self):
+        """Drop the cached copy of this user"""
+        cache.delete(self.cache_key(self.pk))
+    
     def hash_aadhaar(self, aadhaar_number):
         """Hash Aadhaar number with salt for secure storage"""
-        salt = secrets.token_hex(16)
-        aadhaar_with_salt = f"{aadhaar_number}{salt}"
-        hashed = hashlib.sha256(aadhaar_with_salt.encode()).hexdigest()
-        self.aadhaar_hash = f"{salt}:{hashed}"
+        salt = secrets.token_bytes(16)
+        derived = hashlib.pbkdf2_hmac('sha256', aadhaar_number.encode(), salt, AADHAAR_HASH_ITERATIONS)
+        self.aadhaar_hash = f"{salt.hex()}:{derived.hex()}"
         return self.aadhaar_hash
     
     def verify_aadhaar(self, aadhaar_number):
@@ -74,9 +136,10 @@ class CustomUser(AbstractUser):
         
         try:
             salt, stored_hash = self.aadhaar_hash.split(':')
-            aadhaar_with_salt = f"{aadhaar_number}{salt}"
-            computed_hash = hashlib.sha256(aadhaar_with_salt.encode()).hexdigest()
-            return computed_hash == stored_hash
+            derived = hashlib.pbkdf2_hmac(
+                'sha256', aadhaar_number.encode(), bytes.fromhex(salt), AADHAAR_HASH_ITERATIONS
+            )
+            return hmac.compare_digest(derived, bytes.fromhex(stored_hash))
         except ValueError:
             return False
     
@@ -89,23 +152,35 @@ class CustomUser(AbstractUser):
     
     def add_to_wallet(self, amount, description=""):
         """Add money to user wallet"""
-        self.wallet_balance += amount
-        self.save()
-        
-        # Create transaction record
-        WalletTransaction.objects.create(
-            user=self,
-            amount=amount,
-            transaction_type='credit',
-            description=description,
-            balance_after=self.wallet_balance
-        )
+        with transaction.atomic():
+            # Atomic single-statement increment, no read-modify-write race
+            CustomUser.objects.filter(pk=self.pk).update(
+                wallet_balance=F('wallet_balance') + amount,
+                updated_at=timezone.now()
+            )
+            self.refresh_from_db(fields=['wallet_balance'])
+            
+            # Create transaction record
+            WalletTransaction.objects.create(
+                user=self,
+                amount=amount,
+                transaction_type='credit',
+                description=description,
+                balance_after=self.wallet_balance
+            )
     
     def deduct_from_wallet(self, amount, description=""):
         """Deduct money from user wallet"""
-        if self.wallet_balance >= amount:
-            self.wallet_balance -= amount
-            self.save()
+        with transaction.atomic():
+            # The balance check and the decrement happen in the same UPDATE
+            updated = CustomUser.objects.filter(pk=self.pk, wallet_balance__gte=amount).update(
+                wallet_balance=F('wallet_balance') - amount,
+                updated_at=timezone.now()
+            )
+            if not updated:
+                return False
+            
+            self.refresh_from_db(fields=['wallet_balance'])
             
             # Create transaction record
             WalletTransaction.objects.create(
@@ -115,13 +190,18 @@ class CustomUser(AbstractUser):
                 description=description,
                 balance_after=self.wallet_balance
             )
-            return True
-        return False
+        return True
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Keep the JWT user cache in step with every saved change"""
+    transaction.on_commit(instance.invalidate_cache)
 
 
 class OTPVerification(models.Model):
     """
-    Store OTP verification attempts
+    Audit record of issued OTPs (live OTP state is kept in the cache, see otp.py)
     """
     phone_number = models.CharField(max_length=15)
     otp_code = models.CharField(max_length=6)
@@ -151,23 +231,16 @@ class OTPVerification(models.Model):
     def is_expired(self):
         return timezone.now() > self.expires_at
     
-    def verify(self, otp_code):
-        if self.is_expired():
-            return False, "OTP has expired"
-        
-        if self.attempts >= self.max_attempts:
-            return False, "Maximum attempts exceeded"
-        
-        self.attempts += 1
-        self.save()
-        
-        if self.otp_code == otp_code:
-            self.is_verified = True
-            self.verified_at = timezone.now()
-            self.save()
-            return True, "OTP verified successfully"
-        
-        return False, "Invalid OTP"
+    @classmethod
+    def mark_verified(cls, phone_number, purpose, verified_at):
+        """Mark the newest OTP issued for a phone number and purpose verified, if it is recorded yet"""
+        latest = cls.objects.filter(
+            phone_number=phone_number,
+            purpose=purpose,
+            is_verified=False,
+            expires_at__gt=verified_at
+        ).order_by('-created_at', '-pk').values('pk')[:1]
+        return cls.objects.filter(pk=Subquery(latest)).update(is_verified=True, verified_at=verified_at) > 0
 
 
 class WalletTransaction(models.Model):
@@ -193,7 +266,49 @@ class WalletTransaction(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['transaction_type']),
+            models.Index(fields=['user', 'transaction_type', '-created_at']),
         ]
+    
+    @classmethod
+    def record_transactions(cls, items):
+        """Insert many transaction records (dicts of field values) in batched INSERTs"""
+        return cls.objects.bulk_create([cls(**item) for item in items], batch_size=500)
+
+
+class ORJSONEncoder(json.JSONEncoder):
+    """
+    JSON encoder whose encode() runs orjson, for the json.dumps(cls=encoder) calls Django makes
+    """
+    def encode(self, o):
+        return orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class ORJSONField(models.JSONField):
+    """
+    JSONField that encodes and decodes values with orjson on every database backend
+    """
+    def __init__(self, *args, **kwargs):
+        # Every backend adapts values through json.dumps(value, cls=self.encoder), PostgreSQL's
+        # jsonb adapter included, so the encoder keeps JSONField's Value/expression handling
+        kwargs.setdefault('encoder', ORJSONEncoder)
+        super().__init__(*args, **kwargs)
+    
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('encoder') is ORJSONEncoder:
+            del kwargs['encoder']
+        return name, path, args, kwargs
+    
+    def from_db_value(self, value, expression, connection):
+        if value is None or self.decoder is not None:
+            return super().from_db_value(value, expression, connection)
+        # Key lookups can come back already in their SQL type (SQLite)
+        if isinstance(expression, KeyTransform) and not isinstance(value, str):
+            return value
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return value
 
 
 class AuditLog(models.Model):
@@ -206,7 +321,7 @@ class AuditLog(models.Model):
     resource_id = models.CharField(max_length=100, blank=True)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
-    details = models.JSONField(default=dict)
+    details = ORJSONField(default=dict)
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
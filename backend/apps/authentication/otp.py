@@ -0,0 +1,75 @@
+import hmac
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from .audit import log_otp_issued, log_otp_verified
+
+# Live OTP state is kept in the cache (Redis) rather than the OTPVerification
+# table: codes expire with the key and verification needs no SQL round trip
+OTP_TTL = 600  # seconds
+OTP_MAX_ATTEMPTS = 3
+
+
+def _otp_key(phone_number: str, purpose: str) -> str:
+    return f"otp:{purpose}:{phone_number}"
+
+
+def _attempts_key(phone_number: str, purpose: str) -> str:
+    return f"otp_attempts:{purpose}:{phone_number}"
+
+
+def store_otp(phone_number: str, purpose: str, otp_code: str) -> None:
+    """
+    Store a freshly generated OTP, replacing any earlier one and resetting attempts
+    """
+    cache.set_many(_otp_entries(phone_number, purpose, otp_code), timeout=OTP_TTL)
+    log_otp_issued(phone_number, purpose, timezone.now() + timedelta(seconds=OTP_TTL))
+
+
+async def astore_otp(phone_number: str, purpose: str, otp_code: str) -> None:
+    """
+    Async variant of store_otp
+    """
+    await cache.aset_many(_otp_entries(phone_number, purpose, otp_code), timeout=OTP_TTL)
+    log_otp_issued(phone_number, purpose, timezone.now() + timedelta(seconds=OTP_TTL))
+
+
+def _otp_entries(phone_number: str, purpose: str, otp_code: str):
+    return {
+        _otp_key(phone_number, purpose): otp_code,
+        _attempts_key(phone_number, purpose): 0,
+    }
+
+
+def verify_otp(phone_number: str, purpose: str, otp_code: str):
+    """
+    Check an OTP and consume it on success, returning (is_valid, message)
+    """
+    otp_key = _otp_key(phone_number, purpose)
+    attempts_key = _attempts_key(phone_number, purpose)
+    
+    stored_code = cache.get(otp_key)
+    if stored_code is None:
+        return False, "No valid OTP found for this phone number"
+    
+    try:
+        attempts = cache.incr(attempts_key)
+    except ValueError:
+        # Attempts counter expired together with the code
+        return False, "OTP has expired"
+    
+    if attempts > OTP_MAX_ATTEMPTS:
+        return False, "Maximum attempts exceeded"
+    
+    if not hmac.compare_digest(stored_code.encode(), otp_code.encode()):
+        return False, "Invalid OTP"
+    
+    # Only the request that actually removes the key gets to use the code
+    if not cache.delete(otp_key):
+        return False, "No valid OTP found for this phone number"
+    cache.delete(attempts_key)
+    
+    # The audit record is updated by the audit writer, after its own buffered insert
+    log_otp_verified(phone_number, purpose, timezone.now())
+    
+    return True, "OTP verified successfully"
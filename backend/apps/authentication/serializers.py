@@ -2,9 +2,42 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import CustomUser, OTPVerification, WalletTransaction
+from .models import CustomUser, WalletTransaction
+from .otp import verify_otp
+from functools import lru_cache
 import re
 
+_PHONE_RE = re.compile(r'^[6-9]\d{9}$')
+
+
+# Byte-lane constants for the 12-digit SWAR Luhn check (lane i holds digit i)
+_LUHN_ASCII_BIAS = 0x303030303030303030303030
+_LUHN_DOUBLED_LANES = 0x00FF00FF00FF00FF00FF00FF
+_LUHN_HIGH_BITS = 0x808080808080808080808080
+_LUHN_GT4_BIAS = 0x7B7B7B7B7B7B7B7B7B7B7B7B
+_LUHN_LANE_SUM = 0x010101010101010101010101
+
+
+def luhn_check(number):
+    """
+    Luhn algorithm validation for Aadhaar
+
+    All twelve digits are processed at once as byte lanes of a single integer:
+    every other lane (counting from the check digit) is doubled and folded with
+    2d - 9*(d > 4), then the lanes are summed with one multiply.
+    """
+    data = number.encode()
+    if len(data) != 12:
+        return False
+    
+    lanes = int.from_bytes(data, 'little') - _LUHN_ASCII_BIAS
+    doubled = lanes & _LUHN_DOUBLED_LANES
+    over_four = ((doubled + _LUHN_GT4_BIAS) & _LUHN_HIGH_BITS) >> 7
+    lanes += doubled - 9 * over_four
+    
+    checksum = ((lanes * _LUHN_LANE_SUM) >> 88) & 0xFF
+    return checksum % 10 == 0
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
@@ -23,8 +56,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def validate_phone_number(self, value):
         """Validate Indian phone number format"""
-        pattern = r'^[6-9]\d{9}$'
-        if not re.match(pattern, value):
+        if not _PHONE_RE.match(value):
             raise serializers.ValidationError("Enter a valid Indian phone number")
         return value
     
@@ -33,17 +65,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Passwords don't match")
         
         # Verify OTP
-        try:
-            otp_obj = OTPVerification.objects.get(
-                phone_number=attrs['phone_number'],
-                purpose='registration',
-                is_verified=False
-            )
-            is_valid, message = otp_obj.verify(attrs['otp_code'])
-            if not is_valid:
-                raise serializers.ValidationError(f"OTP verification failed: {message}")
-        except OTPVerification.DoesNotExist:
-            raise serializers.ValidationError("No valid OTP found for this phone number")
+        is_valid, message = verify_otp(attrs['phone_number'], 'registration', attrs['otp_code'])
+        if not is_valid:
+            raise serializers.ValidationError(f"OTP verification failed: {message}")
         
         return attrs
     
@@ -88,24 +112,10 @@ class KYCVerificationSerializer(serializers.Serializer):
     
     def validate_aadhaar_number(self, value):
         """Validate Aadhaar number format"""
-        if not value.isdigit():
+        # isascii() is O(1) on str and rejects Unicode digits that isdigit() accepts
+        if not (value.isascii() and value.isdigit()):
             raise serializers.ValidationError("Aadhaar number must contain only digits")
         
-        # Luhn algorithm validation for Aadhaar
-        def luhn_check(number):
-            digits = [int(d) for d in number]
-            checksum = 0
-            reverse_digits = digits[::-1]
-            
-            for i, d in enumerate(reverse_digits):
-                if i % 2 == 1:
-                    d = d * 2
-                    if d > 9:
-                        d = d // 10 + d % 10
-                checksum += d
-            
-            return checksum % 10 == 0
-        
         if not luhn_check(value):
             raise serializers.ValidationError("Invalid Aadhaar number")
         
@@ -129,6 +139,25 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'phone_number', 'role', 'kyc_status', 'aadhaar_verified', 'created_at', 'updated_at']
 
 
+@lru_cache(maxsize=None)
+def _profile_fields():
+    # UserProfileSerializer's own field objects, bound once, so the dict can't drift from it
+    return tuple(
+        (name, field.to_representation) for name, field in UserProfileSerializer().fields.items()
+    )
+
+
+def user_profile_dict(user):
+    """
+    Plain-dict equivalent of UserProfileSerializer(user).data for read-only responses
+    """
+    profile = {}
+    for name, to_representation in _profile_fields():
+        value = getattr(user, name)
+        profile[name] = None if value is None else to_representation(value)
+    return profile
+
+
 class WalletTransactionSerializer(serializers.ModelSerializer):
     """
     Serializer for wallet transactions
@@ -153,8 +182,7 @@ class OTPRequestSerializer(serializers.Serializer):
     
     def validate_phone_number(self, value):
         """Validate Indian phone number format"""
-        pattern = r'^[6-9]\d{9}$'
-        if not re.match(pattern, value):
+        if not _PHONE_RE.match(value):
             raise serializers.ValidationError("Enter a valid Indian phone number")
         return value
 
@@ -173,16 +201,8 @@ class PasswordResetSerializer(serializers.Serializer):
             raise serializers.ValidationError("Passwords don't match")
         
         # Verify OTP
-        try:
-            otp_obj = OTPVerification.objects.get(
-                phone_number=attrs['phone_number'],
-                purpose='password_reset',
-                is_verified=False
-            )
-            is_valid, message = otp_obj.verify(attrs['otp_code'])
-            if not is_valid:
-                raise serializers.ValidationError(f"OTP verification failed: {message}")
-        except OTPVerification.DoesNotExist:
-            raise serializers.ValidationError("No valid OTP found for this phone number")
+        is_valid, message = verify_otp(attrs['phone_number'], 'password_reset', attrs['otp_code'])
+        if not is_valid:
+            raise serializers.ValidationError(f"OTP verification failed: {message}")
         
         return attrs
@@ -0,0 +1,15 @@
+from celery import shared_task
+from django.db.models import Q
+from django.utils import timezone
+from .models import OTPVerification
+
+
+@shared_task
+def purge_stale_otps():
+    """
+    Delete verified and expired OTP audit records so the table doesn't grow without bound
+    """
+    deleted, _ = OTPVerification.objects.filter(
+        Q(is_verified=True) | Q(expires_at__lt=timezone.now())
+    ).delete()
+    return deleted
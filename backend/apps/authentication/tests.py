@@ -0,0 +1,274 @@
+import json
+import random
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import JSONField, Value
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import audit
+from .authentication import CachedJWTAuthentication
+from .models import USER_CACHE_FIELDS, AuditLog, CustomUser, ORJSONEncoder, ORJSONField, OTPVerification
+from .otp import store_otp, verify_otp
+from .serializers import KYCVerificationSerializer, UserProfileSerializer, luhn_check, user_profile_dict
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def reference_luhn(number):
+    """Straightforward digit-by-digit Luhn check"""
+    checksum = 0
+    for i, d in enumerate(int(c) for c in reversed(number)):
+        if i % 2 == 1:
+            d *= 2
+            if d > 9:
+                d -= 9
+        checksum += d
+    return checksum % 10 == 0
+
+
+def with_check_digit(payload):
+    """Append the digit that makes an 11-digit payload pass the Luhn check"""
+    return next(payload + d for d in '0123456789' if reference_luhn(payload + d))
+
+
+class LuhnCheckTests(SimpleTestCase):
+    def test_matches_reference_on_random_numbers(self):
+        rng = random.Random(12)
+        for _ in range(20000):
+            number = ''.join(rng.choice('0123456789') for _ in range(12))
+            self.assertEqual(luhn_check(number), reference_luhn(number), number)
+
+    def test_accepts_valid_numbers(self):
+        rng = random.Random(34)
+        for _ in range(1000):
+            number = with_check_digit(''.join(rng.choice('0123456789') for _ in range(11)))
+            self.assertTrue(luhn_check(number), number)
+
+    def test_rejects_every_single_digit_error(self):
+        number = with_check_digit('23412341234')
+        for i in range(12):
+            for d in '0123456789':
+                if d != number[i]:
+                    typo = number[:i] + d + number[i + 1:]
+                    self.assertFalse(luhn_check(typo), typo)
+
+    def test_boundary_digits(self):
+        # Lanes holding 0, 4, 5 and 9 sit on either side of the doubled-digit fold
+        for number in ['000000000000', '999999999999', '444444444444', '555555555555',
+                       '909090909090', '090909090909', '454545454545', '545454545454']:
+            self.assertEqual(luhn_check(number), reference_luhn(number), number)
+
+    def test_rejects_other_lengths(self):
+        for number in ['', '0', '00000000000', '0000000000000', '000000000000000000000000']:
+            self.assertFalse(luhn_check(number), number)
+
+
+class KYCVerificationSerializerTests(SimpleTestCase):
+    def validate(self, aadhaar_number):
+        serializer = KYCVerificationSerializer(data={'aadhaar_number': aadhaar_number, 'otp_code': '123456'})
+        return serializer.is_valid(), serializer.errors
+
+    def test_accepts_luhn_valid_number(self):
+        valid, errors = self.validate(with_check_digit('23412341234'))
+        self.assertTrue(valid, errors)
+
+    def test_rejects_luhn_invalid_number(self):
+        number = with_check_digit('23412341234')
+        valid, errors = self.validate(number[:-1] + str((int(number[-1]) + 1) % 10))
+        self.assertFalse(valid)
+        self.assertIn('aadhaar_number', errors)
+
+    def test_rejects_non_ascii_digits(self):
+        # Arabic-Indic digits pass str.isdigit() but are not valid input
+        valid, errors = self.validate('٢٣٤١٢٣٤١٢٣٤٦')
+        self.assertFalse(valid)
+        self.assertIn('aadhaar_number', errors)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='reporter', phone_number='9876543210', email='reporter@example.com',
+            password='s3cret-pass', aadhaar_hash='salt:digest'
+        )
+        self.auth = CachedJWTAuthentication()
+
+    def authenticate(self, user=None):
+        token = AccessToken.for_user(user or self.user)
+        return self.auth.get_user(self.auth.get_validated_token(str(token)))
+
+    def test_caches_identity_columns_only(self):
+        self.authenticate()
+        entry = cache.get(CustomUser.cache_key(self.user.pk))
+        self.assertEqual(set(entry), {*USER_CACHE_FIELDS, 'password_md5'})
+        self.assertNotIn(self.user.password, entry.values())
+        self.assertNotIn(self.user.aadhaar_hash, entry.values())
+
+    def test_cached_lookup_skips_database(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(
+            (user.pk, user.role, user.is_active, user.is_staff), (self.user.pk, 'citizen', True, False)
+        )
+
+    def test_cached_user_loads_remaining_columns_in_one_query(self):
+        self.authenticate()
+        user = self.authenticate()
+        with self.assertNumQueries(1):
+            user.load_deferred_fields()
+            self.assertEqual(user.phone_number, '9876543210')
+            self.assertEqual(user.wallet_balance, 0)
+
+    def test_inactive_cached_user_is_rejected(self):
+        self.authenticate()
+        # Deactivated without save(), so the cached entry is the only place it shows up
+        entry = cache.get(CustomUser.cache_key(self.user.pk))
+        cache.set(CustomUser.cache_key(self.user.pk), {**entry, 'is_active': False})
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivation_drops_cached_user(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(cache.get(CustomUser.cache_key(self.user.pk)))
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_revoked_token_is_rejected_from_cache(self):
+        with mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            token = AccessToken.for_user(self.user)
+            self.auth.get_user(self.auth.get_validated_token(str(token)))
+            
+            # Password changed behind the cache's back: only the revoke claim can catch it
+            self.user.set_password('new-s3cret-pass')
+            CustomUser.objects.filter(pk=self.user.pk).update(password=self.user.password)
+            self.user.prime_cache()
+            
+            with self.assertRaises(AuthenticationFailed):
+                self.auth.get_user(self.auth.get_validated_token(str(token)))
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+
+    def test_profile_served_for_cached_user(self):
+        self.authenticate()
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(reverse('user_profile'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['phone_number'], '9876543210')
+        self.assertEqual(response.json()['role'], 'citizen')
+
+
+class UserProfileDictTests(TestCase):
+    def test_matches_profile_serializer(self):
+        user = CustomUser.objects.create_user(
+            username='reporter', phone_number='9876543210', email='reporter@example.com',
+            password='s3cret-pass', city='Pune', wallet_balance='125.50'
+        )
+        user.refresh_from_db()
+        self.assertEqual(user_profile_dict(user), UserProfileSerializer(user).data)
+
+
+class ORJSONFieldTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='reporter', phone_number='9876543210', email='reporter@example.com', password='s3cret-pass'
+        )
+
+    def log(self, details):
+        return AuditLog.objects.create(
+            user=self.user, action='user_login', resource_type='user', ip_address='127.0.0.1', details=details
+        )
+
+    def test_encodes_with_orjson(self):
+        # Compact separators are orjson's; the stdlib encoder would emit '{"a": 1}'
+        field = AuditLog._meta.get_field('details')
+        self.assertEqual(field.get_db_prep_value({'a': 1}, connection), '{"a":1}')
+        # The same call PostgreSQL's jsonb adapter makes with the field's encoder
+        self.assertEqual(json.dumps({'a': [1, 2]}, cls=ORJSONEncoder), '{"a":[1,2]}')
+
+    def test_round_trip_and_key_lookup(self):
+        entry = self.log({'login_method': 'password', 'attempt': 2, 'tags': ['otp', None]})
+        entry.refresh_from_db()
+        self.assertEqual(entry.details, {'login_method': 'password', 'attempt': 2, 'tags': ['otp', None]})
+        self.assertTrue(AuditLog.objects.filter(details__login_method='password').exists())
+        self.assertEqual(AuditLog.objects.values_list('details__attempt', flat=True).get(), 2)
+
+    def test_update_with_json_value_expression(self):
+        entry = self.log({})
+        AuditLog.objects.filter(pk=entry.pk).update(details=Value({'k': 'v'}, output_field=JSONField()))
+        entry.refresh_from_db()
+        self.assertEqual(entry.details, {'k': 'v'})
+
+    def test_default_encoder_not_deconstructed(self):
+        _, path, _, kwargs = ORJSONField(default=dict).deconstruct()
+        self.assertEqual(path, 'apps.authentication.models.ORJSONField')
+        self.assertNotIn('encoder', kwargs)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OTPAuditTests(TestCase):
+    """
+    Audit writes are flushed by hand instead of by the background writer thread
+    """
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(audit, '_ensure_writer')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.drain_queue)
+        self.drain_queue()
+
+    def drain_queue(self):
+        while not audit._audit_queue.empty():
+            audit._audit_queue.get_nowait()
+
+    def test_verify_before_issue_record_is_flushed(self):
+        store_otp('9876543210', 'registration', '482913')
+        with self.assertNumQueries(0):
+            self.assertEqual(verify_otp('9876543210', 'registration', '482913'), (True, "OTP verified successfully"))
+        
+        audit.flush_audit_logs()
+        record = OTPVerification.objects.get(phone_number='9876543210', purpose='registration')
+        self.assertTrue(record.is_verified)
+        self.assertIsNotNone(record.verified_at)
+
+    def test_verify_waits_for_issue_record_from_another_worker(self):
+        store_otp('9876543210', 'registration', '482913')
+        # The issue record is buffered elsewhere; only the verification is queued here
+        issued = audit._audit_queue.get_nowait()
+        verify_otp('9876543210', 'registration', '482913')
+        
+        audit.flush_audit_logs()
+        self.assertFalse(OTPVerification.objects.exists())
+        
+        audit._write_batch([issued])
+        audit.flush_audit_logs()
+        self.assertTrue(OTPVerification.objects.get().is_verified)
+
+    def test_only_newest_issued_otp_is_marked(self):
+        store_otp('9876543210', 'login', '111111')
+        store_otp('9876543210', 'login', '222222')
+        self.assertEqual(verify_otp('9876543210', 'login', '111111'), (False, "Invalid OTP"))
+        self.assertTrue(verify_otp('9876543210', 'login', '222222')[0])
+        
+        audit.flush_audit_logs()
+        self.assertEqual(
+            list(OTPVerification.objects.order_by('pk').values_list('is_verified', flat=True)), [False, True]
+        )
+
+    def test_failed_verification_leaves_record_unverified(self):
+        store_otp('9876543210', 'login', '111111')
+        self.assertFalse(verify_otp('9876543210', 'login', '999999')[0])
+        
+        audit.flush_audit_logs()
+        self.assertFalse(OTPVerification.objects.get().is_verified)
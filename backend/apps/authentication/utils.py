@@ -1,30 +1,97 @@
+import asyncio
+import hmac
+import httpx
+import re
 import requests
-import random
-import string
+import secrets
+import weakref
 from django.conf import settings
 from django.core.mail import send_mail
-from typing import Dict, Any
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from rest_framework_simplejwt.tokens import RefreshToken
+from typing import Dict, Any, Tuple
+from urllib3.util.retry import Retry
+
+_PHONE_RE = re.compile(r'^[6-9]\d{9}$')
+
+# Shared keep-alive session for the SMS gateway and UIDAI so TCP/TLS
+# handshakes are amortized across calls
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+_HTTP_SESSION.headers['Connection'] = 'keep-alive'
+
+# Async counterpart, one pooled client per event loop: under ASGI that is the worker's
+# single loop for the life of the process. httpx connections can't move between loops,
+# so a per-call loop (async_to_sync in tests or management commands) gets its own
+# client, which is dropped together with the loop
+_ASYNC_HTTP_CLIENTS = weakref.WeakKeyDictionary()
 
 
 def get_client_ip(request) -> str:
     """
-    Get client IP address from request
+    Get client IP address from request (memoized on the request)
     """
+    if (ip := getattr(request, '_cached_ip', None)) is not None:
+        return ip
+    
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        ip = x_forwarded_for.partition(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
+    
+    request._cached_ip = ip
     return ip
 
 
+def _async_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_HTTP_CLIENTS.get(loop)
+    if client is None:
+        client = _ASYNC_HTTP_CLIENTS[loop] = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=10)
+        )
+    return client
+
+
+def _otp_message(otp_code: str, purpose: str) -> str:
+    return f"Your SnapChallan OTP for {purpose} is: {otp_code}. Valid for 10 minutes. Do not share this OTP."
+
+
+@lru_cache(maxsize=None)
+def _sms_base_data() -> Dict[str, str]:
+    # Built on first use: the gateway settings are only required outside DEBUG
+    return {
+        'apikey': settings.SMS_API_KEY,
+        'sender': 'SNAPCH'
+    }
+
+
+def _sms_data(phone_number: str, message: str) -> Dict[str, str]:
+    return {**_sms_base_data(), 'numbers': phone_number, 'message': message}
+
+
+@lru_cache(maxsize=None)
+def _uidai_verify_request() -> Tuple[str, Dict[str, str]]:
+    return f"{settings.UIDAI_API_BASE_URL}/verify", {
+        'Authorization': f'Bearer {settings.UIDAI_API_KEY}',
+        'Content-Type': 'application/json'
+    }
+
+
 def send_otp(phone_number: str, otp_code: str, purpose: str) -> bool:
     """
     Send OTP via SMS using SMS gateway
     """
     try:
         # SMS API integration (example with TextLocal)
-        message = f"Your SnapChallan OTP for {purpose} is: {otp_code}. Valid for 10 minutes. Do not share this OTP."
+        message = _otp_message(otp_code, purpose)
         
         # Mock SMS sending - replace with actual SMS gateway
         if settings.DEBUG:
@@ -32,16 +99,9 @@ def send_otp(phone_number: str, otp_code: str, purpose: str) -> bool:
             return True
         
         # Example SMS API call
-        sms_data = {
-            'apikey': settings.SMS_API_KEY,
-            'numbers': phone_number,
-            'message': message,
-            'sender': 'SNAPCH'
-        }
-        
-        response = requests.post(
+        response = _HTTP_SESSION.post(
             settings.SMS_API_URL,
-            data=sms_data,
+            data=_sms_data(phone_number, message),
             timeout=10
         )
         
@@ -52,6 +112,29 @@ def send_otp(phone_number: str, otp_code: str, purpose: str) -> bool:
         return False
 
 
+async def send_otp_async(phone_number: str, otp_code: str, purpose: str) -> bool:
+    """
+    Send OTP via SMS without blocking the event loop
+    """
+    try:
+        message = _otp_message(otp_code, purpose)
+        
+        if settings.DEBUG:
+            print(f"SMS to {phone_number}: {message}")
+            return True
+        
+        response = await _async_http_client().post(
+            settings.SMS_API_URL,
+            data=_sms_data(phone_number, message)
+        )
+        
+        return response.status_code == 200
+    
+    except Exception as e:
+        print(f"SMS sending failed: {e}")
+        return False
+
+
 def verify_aadhaar_with_uidai(aadhaar_number: str, otp_code: str) -> Dict[str, Any]:
     """
     Verify Aadhaar with UIDAI eKYC API
@@ -60,7 +143,7 @@ def verify_aadhaar_with_uidai(aadhaar_number: str, otp_code: str) -> Dict[str, A
         # UIDAI API integration
         if settings.DEBUG:
             # Mock verification for development
-            if otp_code == "123456":
+            if hmac.compare_digest(otp_code.encode(), b"123456"):
                 return {
                     'success': True,
                     'message': 'Verification successful',
@@ -78,10 +161,7 @@ def verify_aadhaar_with_uidai(aadhaar_number: str, otp_code: str) -> Dict[str, A
                 }
         
         # Production UIDAI API call
-        headers = {
-            'Authorization': f'Bearer {settings.UIDAI_API_KEY}',
-            'Content-Type': 'application/json'
-        }
+        url, headers = _uidai_verify_request()
         
         payload = {
             'aadhaar_number': aadhaar_number,
@@ -89,8 +169,8 @@ def verify_aadhaar_with_uidai(aadhaar_number: str, otp_code: str) -> Dict[str, A
             'purpose': 'eKYC'
         }
         
-        response = requests.post(
-            f"{settings.UIDAI_API_BASE_URL}/verify",
+        response = _HTTP_SESSION.post(
+            url,
             json=payload,
             headers=headers,
             timeout=30
@@ -121,35 +201,42 @@ def verify_aadhaar_with_uidai(aadhaar_number: str, otp_code: str) -> Dict[str, A
         }
 
 
+def issue_tokens(user) -> Dict[str, str]:
+    """
+    Create a refresh/access JWT pair for the user
+    """
+    refresh = RefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
 def generate_secure_token(length: int = 32) -> str:
     """
     Generate a secure random token
     """
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+    # Each random byte yields 4/3 base64 characters, so only draw what is needed
+    return secrets.token_urlsafe((length * 3 + 3) // 4)[:length]
 
 
 def validate_indian_phone(phone_number: str) -> bool:
     """
     Validate Indian phone number format
     """
-    import re
-    pattern = r'^[6-9]\d{9}$'
-    return bool(re.match(pattern, phone_number))
+    return bool(_PHONE_RE.match(phone_number))
 
 
 def mask_aadhaar(aadhaar_number: str) -> str:
     """
     Mask Aadhaar number for display (show only last 4 digits)
     """
-    if len(aadhaar_number) != 12:
-        return "****-****-****"
-    return f"****-****-{aadhaar_number[-4:]}"
+    return "****-****-" + (aadhaar_number[-4:] if len(aadhaar_number) == 12 else "****")
 
 
 def mask_phone(phone_number: str) -> str:
     """
     Mask phone number for display
     """
-    if len(phone_number) < 6:
-        return "*" * len(phone_number)
-    return f"******{phone_number[-4:]}"
+    # Fixed-width prefix so the masked value doesn't reveal the number's length
+    return "******" + phone_number[-4:] if len(phone_number) >= 6 else "*" * len(phone_number)
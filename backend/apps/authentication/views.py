@@ -1,3 +1,4 @@
+from adrf.views import APIView as AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
@@ -5,60 +6,44 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import login, logout
 from django.utils import timezone
 from django.conf import settings
-from .models import CustomUser, OTPVerification, WalletTransaction, AuditLog
+from .models import CustomUser, WalletTransaction
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, KYCVerificationSerializer,
     UserProfileSerializer, WalletTransactionSerializer, OTPRequestSerializer,
-    PasswordResetSerializer
+    PasswordResetSerializer, user_profile_dict
 )
-from .utils import send_otp, verify_aadhaar_with_uidai, get_client_ip
-import random
-import string
-from datetime import timedelta
+from .utils import send_otp_async, verify_aadhaar_with_uidai, get_client_ip, issue_tokens
+from .audit import log_action
+from .otp import OTP_TTL, astore_otp
+import asyncio
+import secrets
 
 
-class OTPRequestView(APIView):
+class OTPRequestView(AsyncAPIView):
     """
     Send OTP for various purposes (registration, login, KYC, password reset)
     """
     permission_classes = [permissions.AllowAny]
     
-    def post(self, request):
+    async def post(self, request):
         serializer = OTPRequestSerializer(data=request.data)
         if serializer.is_valid():
             phone_number = serializer.validated_data['phone_number']
             purpose = serializer.validated_data['purpose']
             
             # Generate 6-digit OTP
-            otp_code = ''.join(random.choices(string.digits, k=6))
+            otp_code = f"{secrets.randbelow(1_000_000):06d}"
             
-            # Create OTP record
-            expires_at = timezone.now() + timedelta(minutes=10)
-            otp_obj, created = OTPVerification.objects.get_or_create(
-                phone_number=phone_number,
-                purpose=purpose,
-                is_verified=False,
-                defaults={
-                    'otp_code': otp_code,
-                    'expires_at': expires_at,
-                    'attempts': 0
-                }
+            # Store OTP in the cache and send it via SMS concurrently
+            _, success = await asyncio.gather(
+                astore_otp(phone_number, purpose, otp_code),
+                send_otp_async(phone_number, otp_code, purpose)
             )
             
-            if not created:
-                # Update existing OTP
-                otp_obj.otp_code = otp_code
-                otp_obj.expires_at = expires_at
-                otp_obj.attempts = 0
-                otp_obj.save()
-            
-            # Send OTP via SMS
-            success = send_otp(phone_number, otp_code, purpose)
-            
             if success:
                 return Response({
                     'message': 'OTP sent successfully',
-                    'expires_in': 600  # 10 minutes
+                    'expires_in': OTP_TTL
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({
@@ -80,7 +65,7 @@ class UserRegistrationView(APIView):
             user = serializer.save()
             
             # Create audit log
-            AuditLog.objects.create(
+            log_action(
                 user=user,
                 action='user_registration',
                 resource_type='user',
@@ -90,16 +75,10 @@ class UserRegistrationView(APIView):
                 details={'registration_method': 'phone_otp'}
             )
             
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
-            
             return Response({
                 'message': 'User registered successfully',
-                'user': UserProfileSerializer(user).data,
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
+                'user': user_profile_dict(user),
+                'tokens': issue_tokens(user)
             }, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -116,32 +95,29 @@ class UserLoginView(APIView):
         if serializer.is_valid():
             user = serializer.validated_data['user']
             
+            ip_address = get_client_ip(request)
+            
             # Update last login info
             user.last_login = timezone.now()
-            user.last_login_ip = get_client_ip(request)
-            user.save()
+            user.last_login_ip = ip_address
+            user.save(update_fields=['last_login', 'last_login_ip'])
+            user.prime_cache()
             
             # Create audit log
-            AuditLog.objects.create(
+            log_action(
                 user=user,
                 action='user_login',
                 resource_type='user',
                 resource_id=str(user.id),
-                ip_address=get_client_ip(request),
+                ip_address=ip_address,
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 details={'login_method': 'password'}
             )
             
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
-            
             return Response({
                 'message': 'Login successful',
-                'user': UserProfileSerializer(user).data,
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
+                'user': user_profile_dict(user),
+                'tokens': issue_tokens(user)
             }, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -160,7 +136,7 @@ class UserLogoutView(APIView):
             token.blacklist()
             
             # Create audit log
-            AuditLog.objects.create(
+            log_action(
                 user=request.user,
                 action='user_logout',
                 resource_type='user',
@@ -186,6 +162,8 @@ class KYCVerificationView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
+        # Cached JWT users carry only identity columns; KYC reads and saves the full row
+        request.user.load_deferred_fields()
         if request.user.aadhaar_verified:
             return Response({
                 'error': 'KYC already completed'
@@ -205,7 +183,7 @@ class KYCVerificationView(APIView):
                 request.user.complete_kyc()
                 
                 # Create audit log
-                AuditLog.objects.create(
+                log_action(
                     user=request.user,
                     action='kyc_verification',
                     resource_type='user',
@@ -217,7 +195,7 @@ class KYCVerificationView(APIView):
                 
                 return Response({
                     'message': 'KYC verification successful',
-                    'user': UserProfileSerializer(request.user).data
+                    'user': user_profile_dict(request.user)
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({
@@ -235,16 +213,16 @@ class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        serializer = UserProfileSerializer(request.user)
+        serializer = UserProfileSerializer(request.user.load_deferred_fields())
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def put(self, request):
-        serializer = UserProfileSerializer(request.user, data=request.data, partial=True)
+        serializer = UserProfileSerializer(request.user.load_deferred_fields(), data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             
             # Create audit log
-            AuditLog.objects.create(
+            log_action(
                 user=request.user,
                 action='profile_update',
                 resource_type='user',
@@ -266,7 +244,13 @@ class WalletView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        transactions = WalletTransaction.objects.filter(user=request.user)[:20]
+        # Only the serialized columns, newest first (served by the user/-created_at index)
+        transactions = (
+            WalletTransaction.objects
+            .filter(user_id=request.user.id)
+            .only(*WalletTransactionSerializer.Meta.fields)
+            .order_by('-created_at')[:20]
+        )
         return Response({
             'balance': request.user.wallet_balance,
             'transactions': WalletTransactionSerializer(transactions, many=True).data
@@ -288,10 +272,10 @@ class PasswordResetView(APIView):
             try:
                 user = CustomUser.objects.get(phone_number=phone_number)
                 user.set_password(new_password)
-                user.save()
+                user.save(update_fields=['password'])
                 
                 # Create audit log
-                AuditLog.objects.create(
+                log_action(
                     user=user,
                     action='password_reset',
                     resource_type='user',
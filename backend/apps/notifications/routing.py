@@ -0,0 +1,3 @@
+websocket_urlpatterns = [
+    # Add notification WebSocket consumers here
+]
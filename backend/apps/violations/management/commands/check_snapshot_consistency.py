@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Q, Subquery
+from apps.violations.models import Challan, Violation
+
+
+class Command(BaseCommand):
+    help = 'Verify challan snapshot fields still match their violations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite stale snapshots from the current violation data'
+        )
+
+    def handle(self, *args, **options):
+        stale = Challan.objects.exclude(
+            Q(vehicle_number_snapshot=F('violation__vehicle_number')) &
+            Q(city_snapshot=F('violation__city')) &
+            Q(violation_type_code_snapshot=F('violation__violation_type__code'))
+        )
+        
+        challan_numbers = list(stale.values_list('challan_number', flat=True))
+        if not challan_numbers:
+            self.stdout.write(self.style.SUCCESS('All challan snapshots are consistent'))
+            return
+        
+        for challan_number in challan_numbers:
+            self.stdout.write(f'Stale snapshot: {challan_number}')
+        
+        if options['fix']:
+            violation = Violation.objects.filter(pk=OuterRef('violation_id'))
+            Challan.objects.filter(challan_number__in=challan_numbers).update(
+                vehicle_number_snapshot=Subquery(violation.values('vehicle_number')[:1]),
+                city_snapshot=Subquery(violation.values('city')[:1]),
+                violation_type_code_snapshot=Subquery(violation.values('violation_type__code')[:1])
+            )
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(challan_numbers)} challan snapshots'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(challan_numbers)} stale challan snapshots; rerun with --fix to repair'
+            ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-15 10:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_fine_amounts(apps, schema_editor):
+    Violation = apps.get_model('violations', 'Violation')
+    ViolationType = apps.get_model('violations', 'ViolationType')
+    Violation.objects.update(
+        fine_amount_snapshot=Subquery(
+            ViolationType.objects.filter(pk=OuterRef('violation_type_id')).values('fine_amount')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('violations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='violation',
+            name='fine_amount_snapshot',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(copy_fine_amounts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='violation',
+            name='fine_amount_snapshot',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10),
+        ),
+    ]
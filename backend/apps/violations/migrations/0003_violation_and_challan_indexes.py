@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-15 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('violations', '0002_violation_fine_amount_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['status', '-created_at'], name='violations__status_bbaae9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['reporter', 'status'], name='violations__reporte_8d5f86_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at'], name='viol_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='challan',
+            index=models.Index(condition=models.Q(('status__in', ['issued', 'overdue'])), fields=['due_date'], name='challan_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-15 10:48
+
+from django.db import migrations
+
+# GIN indexes only exist on PostgreSQL (jsonb); other backends store these
+# JSON columns as text and skip them
+GIN_INDEXES = [
+    ('viol_ai_objects_gin', 'ai_detected_objects'),
+    ('viol_ai_extracted_gin', 'ai_extracted_data'),
+]
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in GIN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "violations_violation" USING gin ("{column}")'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('violations', '0003_violation_and_challan_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
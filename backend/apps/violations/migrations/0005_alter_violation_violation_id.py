@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-15 11:02
+
+import apps.violations.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('violations', '0004_violation_ai_json_gin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='violation',
+            name='violation_id',
+            field=models.UUIDField(default=apps.violations.models.uuid7, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.1 on 2026-10-15 16:40
+
+from django.db import migrations, models
+from django.db.models import Case, IntegerField, Value, When
+
+
+STATUS_CODES = {
+    'pending': 0,
+    'under_review': 1,
+    'approved': 2,
+    'rejected': 3,
+    'challan_issued': 4,
+    'payment_received': 5,
+    'closed': 6,
+}
+
+
+def forwards(apps, schema_editor):
+    Violation = apps.get_model('violations', 'Violation')
+    Violation.objects.update(status_int=Case(
+        *[When(status=slug, then=Value(code)) for slug, code in STATUS_CODES.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    ))
+
+
+def backwards(apps, schema_editor):
+    Violation = apps.get_model('violations', 'Violation')
+    Violation.objects.update(status=Case(
+        *[When(status_int=code, then=Value(slug)) for slug, code in STATUS_CODES.items()],
+        default=Value('pending'),
+        output_field=models.CharField()
+    ))
+
+
+STATUS_CHOICES = [(0, 'Pending Review'), (1, 'Under Review'), (2, 'Approved'), (3, 'Rejected'), (4, 'Challan Issued'), (5, 'Payment Received'), (6, 'Closed')]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('violations', '0005_alter_violation_violation_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='violation',
+            name='violations__status_f07abc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='violation',
+            name='violations__status_bbaae9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='violation',
+            name='violations__reporte_8d5f86_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='violation',
+            name='viol_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='violation',
+            name='status_int',
+            field=models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=0),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(
+            model_name='violation',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='violation',
+            old_name='status_int',
+            new_name='status',
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['status'], name='violations__status_f07abc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['status', '-created_at'], name='violations__status_bbaae9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['reporter', 'status'], name='violations__reporte_8d5f86_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(condition=models.Q(('status', 0)), fields=['-created_at'], name='viol_pending_idx'),
+        ),
+    ]
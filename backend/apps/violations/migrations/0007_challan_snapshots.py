@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-15 17:05
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_violation_snapshots(apps, schema_editor):
+    Challan = apps.get_model('violations', 'Challan')
+    Violation = apps.get_model('violations', 'Violation')
+    violation = Violation.objects.filter(pk=OuterRef('violation_id'))
+    Challan.objects.update(
+        vehicle_number_snapshot=Subquery(violation.values('vehicle_number')[:1]),
+        city_snapshot=Subquery(violation.values('city')[:1]),
+        violation_type_code_snapshot=Subquery(violation.values('violation_type__code')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('violations', '0006_violation_status_smallint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challan',
+            name='vehicle_number_snapshot',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='challan',
+            name='city_snapshot',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='challan',
+            name='violation_type_code_snapshot',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(copy_violation_snapshots, migrations.RunPython.noop),
+    ]
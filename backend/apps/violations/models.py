@@ -1,10 +1,93 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.db.models.functions import Now, Round
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.authentication.models import WalletTransaction
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+import os
+import time
 import uuid
 
 User = get_user_model()
 
+# Share of the fine paid to the reporter of an approved violation
+REWARD_RATE = Decimal('0.40')
+
+# Cached payload of the public violation types endpoint
+VIOLATION_TYPES_CACHE_KEY = 'violation_types_v1'
+
+# Version of the ViolationType table shared by every process through the cache; any change
+# to a type replaces it, and each process reloads its local copy when the version moves
+VIOLATION_TYPE_VERSION_KEY = 'violation_type_version'
+
+
+def uuid7():
+    """Time-ordered UUID (RFC 9562 version 7) so new rows land at the end of the index"""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+class ViolationQuerySet(models.QuerySet):
+    def without_blobs(self):
+        """
+        Defer the AI result JSON and long text columns that listings don't render
+        """
+        return self.defer('ai_detected_objects', 'ai_extracted_data', 'review_notes', 'description')
+    
+    def for_list(self):
+        """
+        Card columns only; violation_type stays joined for __str__ so nothing lazy-loads
+        """
+        return self.select_related(None).select_related('violation_type').only(
+            'id', 'violation_id', 'status', 'vehicle_number', 'city', 'state', 'occurred_at',
+            'violation_type', 'reporter', 'reward_amount', 'created_at',
+            'violation_type__name', 'violation_type__code'
+        )
+    
+    def for_detail(self):
+        """
+        Full rows with the media files and comments a detail page renders
+        """
+        return self.prefetch_related(
+            Prefetch(
+                'media_files',
+                queryset=ViolationMedia.objects.select_related(None).only(
+                    'id', 'violation', 'media_type', 'gridfs_file_id', 'processed'
+                )
+            ),
+            Prefetch(
+                'comments',
+                queryset=ViolationComment.objects.select_related(None).select_related('author').only(
+                    'id', 'violation', 'comment', 'is_internal', 'created_at', 'author', 'author__username'
+                )
+            ),
+        )
+
+
+class ViolationManager(models.Manager.from_queryset(ViolationQuerySet)):
+    """
+    Joins the foreign keys used by __str__, reviews and reward payment
+    """
+    def get_queryset(self):
+        return super().get_queryset().select_related('violation_type', 'reporter', 'reviewed_by')
+
+
+class ViolationMediaManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().select_related('violation__violation_type')
+
+
+class ViolationCommentManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().select_related('violation', 'author')
+
 
 class ViolationType(models.Model):
     """
@@ -31,22 +114,81 @@ class ViolationType(models.Model):
         return f"{self.code} - {self.name}"
 
 
+ViolationTypeInfo = namedtuple('ViolationTypeInfo', ['code', 'fine_amount', 'confidence_threshold', 'ai_detectable'])
+
+
+_violation_type_local = (None, {})
+
+
+def _load_violation_type_table():
+    return {
+        pk: ViolationTypeInfo(vt.code, vt.fine_amount, vt.confidence_threshold, vt.ai_detectable)
+        for pk, vt in ViolationType.objects.only(
+            'id', 'code', 'fine_amount', 'confidence_threshold', 'ai_detectable'
+        ).in_bulk().items()
+    }
+
+
+def _violation_type_table(reload=False):
+    """Whole ViolationType reference table, reloaded only when the shared version changes"""
+    global _violation_type_local
+    # A fresh, unique version if the key is missing (first use or cache flush)
+    version = cache.get_or_set(VIOLATION_TYPE_VERSION_KEY, time.time_ns, timeout=None)
+    if reload or _violation_type_local[0] != version:
+        _violation_type_local = (version, _load_violation_type_table())
+    return _violation_type_local[1]
+
+
+def get_violation_type(violation_type_id):
+    """Cached fine/detection settings of a violation type"""
+    table = _violation_type_table()
+    if violation_type_id not in table:
+        # Created since the table was loaded, before its change was announced
+        table = _violation_type_table(reload=True)
+    return table[violation_type_id]
+
+
+def _announce_violation_type_change():
+    cache.set(VIOLATION_TYPE_VERSION_KEY, time.time_ns(), timeout=None)
+    cache.delete(VIOLATION_TYPES_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=ViolationType)
+def invalidate_violation_type_cache(sender, **kwargs):
+    """Make every process reload the reference table and drop the cached types list after any change"""
+    # After commit, so no process can reload the old rows under the new version
+    transaction.on_commit(_announce_violation_type_change)
+
+
+class ViolationStatus(models.IntegerChoices):
+    """Review lifecycle of a violation, stored as a 2-byte integer"""
+    PENDING = 0, 'Pending Review'
+    UNDER_REVIEW = 1, 'Under Review'
+    APPROVED = 2, 'Approved'
+    REJECTED = 3, 'Rejected'
+    CHALLAN_ISSUED = 4, 'Challan Issued'
+    PAYMENT_RECEIVED = 5, 'Payment Received'
+    CLOSED = 6, 'Closed'
+    
+    @property
+    def slug(self):
+        """Lowercase name ('pending', 'challan_issued', ...) the API exchanges instead of the code"""
+        return self.name.lower()
+
+
 class Violation(models.Model):
     """
     Traffic violation reports submitted by citizens
     """
-    STATUS_CHOICES = [
-        ('pending', 'Pending Review'),
-        ('under_review', 'Under Review'),
-        ('approved', 'Approved'),
-        ('rejected', 'Rejected'),
-        ('challan_issued', 'Challan Issued'),
-        ('payment_received', 'Payment Received'),
-        ('closed', 'Closed'),
-    ]
+    Status = ViolationStatus
+    STATUS_CHOICES = ViolationStatus.choices
+    
+    # Statuses the bulk review and payout transitions start from; other rows are skipped
+    APPROVABLE_STATUSES = (ViolationStatus.PENDING, ViolationStatus.UNDER_REVIEW)
+    PAYABLE_STATUSES = (ViolationStatus.APPROVED, ViolationStatus.CHALLAN_ISSUED)
     
     # Unique identifier
-    violation_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    violation_id = models.UUIDField(default=uuid7, editable=False, unique=True)
     
     # Reporter information
     reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reported_violations')
@@ -55,6 +197,10 @@ class Violation(models.Model):
     violation_type = models.ForeignKey(ViolationType, on_delete=models.CASCADE)
     description = models.TextField()
     
+    # Fine at report time, copied from violation_type so rewards and
+    # statistics don't need to join violation types
+    fine_amount_snapshot = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
+    
     # Location data
     latitude = models.FloatField()
     longitude = models.FloatField()
@@ -73,7 +219,7 @@ class Violation(models.Model):
     reported_at = models.DateTimeField(auto_now_add=True)
     
     # Status and review
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    status = models.PositiveSmallIntegerField(choices=ViolationStatus.choices, default=ViolationStatus.PENDING)
     reviewed_by = models.ForeignKey(
         User, 
         on_delete=models.SET_NULL, 
@@ -99,6 +245,8 @@ class Violation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ViolationManager()
+    
     class Meta:
         db_table = 'violations_violation'
         ordering = ['-created_at']
@@ -108,38 +256,67 @@ class Violation(models.Model):
             models.Index(fields=['violation_type']),
             models.Index(fields=['city', 'state']),
             models.Index(fields=['occurred_at']),
+            # Review queue and per-status / per-reporter listings
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['reporter', 'status']),
+            models.Index(
+                fields=['-created_at'],
+                name='viol_pending_idx',
+                condition=Q(status=ViolationStatus.PENDING)
+            ),
         ]
     
     def __str__(self):
         return f"Violation {self.violation_id} - {self.violation_type.name}"
     
+    @property
+    def status_slug(self):
+        """Lowercase status name ('pending', 'challan_issued', ...) for API payloads"""
+        return ViolationStatus(self.status).slug
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.fine_amount_snapshot is None:
+            self.fine_amount_snapshot = get_violation_type(self.violation_type_id).fine_amount
+        super().save(*args, **kwargs)
+    
     def approve(self, reviewer, notes=""):
         """Approve violation and calculate reward"""
-        self.status = 'approved'
-        self.reviewed_by = reviewer
-        self.reviewed_at = timezone.now()
-        self.review_notes = notes
+        type(self).bulk_approve(Violation.objects.filter(pk=self.pk), reviewer, notes)
         
-        # Calculate 40% reward
-        self.reward_amount = self.violation_type.fine_amount * 0.4
-        self.save()
+        # Reward and timestamps were computed by the UPDATE, which skips a violation already reviewed
+        self.refresh_from_db(fields=[
+            'status', 'reviewed_by', 'reviewed_at', 'review_notes', 'reward_amount', 'updated_at'
+        ])
+    
+    @classmethod
+    def bulk_approve(cls, queryset, reviewer, notes=""):
+        """Approve violations awaiting review, computing each 40% reward in the same UPDATE"""
+        now = Now()
+        return queryset.filter(status__in=cls.APPROVABLE_STATUSES).update(
+            status=ViolationStatus.APPROVED,
+            reviewed_by=reviewer,
+            reviewed_at=now,
+            review_notes=notes,
+            reward_amount=Round(F('fine_amount_snapshot') * REWARD_RATE, 2),
+            updated_at=now
+        )
     
     def reject(self, reviewer, notes=""):
         """Reject violation"""
-        self.status = 'rejected'
+        self.status = ViolationStatus.REJECTED
         self.reviewed_by = reviewer
         self.reviewed_at = timezone.now()
         self.review_notes = notes
-        self.save()
+        self.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'review_notes', 'updated_at'])
     
     def issue_challan(self):
         """Mark as challan issued"""
-        self.status = 'challan_issued'
-        self.save()
+        self.status = ViolationStatus.CHALLAN_ISSUED
+        self.save(update_fields=['status', 'updated_at'])
     
     def mark_payment_received(self):
         """Mark payment as received and pay reward"""
-        self.status = 'payment_received'
+        self.status = ViolationStatus.PAYMENT_RECEIVED
         
         if not self.reward_paid and self.reward_amount > 0:
             # Add reward to reporter's wallet
@@ -150,7 +327,61 @@ class Violation(models.Model):
             self.reward_paid = True
             self.reward_paid_at = timezone.now()
         
-        self.save()
+        self.save(update_fields=['status', 'reward_paid', 'reward_paid_at', 'updated_at'])
+    
+    @classmethod
+    def bulk_mark_paid(cls, queryset):
+        """Mark approved violations paid, crediting rewards with one wallet UPDATE per reporter"""
+        # Timestamps are taken by the database, once per statement
+        now = Now()
+        
+        with transaction.atomic():
+            # Lock the batch so a concurrent payout can't credit the same rewards twice
+            pks = list(
+                queryset.filter(status__in=cls.PAYABLE_STATUSES)
+                .select_related(None).select_for_update().values_list('pk', flat=True)
+            )
+            rewards = list(
+                cls.objects.filter(pk__in=pks, reward_paid=False, reward_amount__gt=0)
+                .order_by('reporter_id', 'pk')
+                .values_list('pk', 'reporter_id', 'violation_id', 'reward_amount')
+            )
+            
+            totals = defaultdict(Decimal)
+            for _, reporter_id, _, amount in rewards:
+                totals[reporter_id] += amount
+            
+            for reporter_id, total in totals.items():
+                User.objects.filter(pk=reporter_id).update(
+                    wallet_balance=F('wallet_balance') + total,
+                    updated_at=now
+                )
+            
+            # Running balances for the per-violation wallet records
+            balances = dict(
+                User.objects.filter(pk__in=totals).values_list('pk', 'wallet_balance')
+            )
+            for reporter_id, total in totals.items():
+                balances[reporter_id] -= total
+            
+            records = []
+            for _, reporter_id, violation_id, amount in rewards:
+                balances[reporter_id] += amount
+                records.append({
+                    'user_id': reporter_id,
+                    'amount': amount,
+                    'transaction_type': 'credit',
+                    'description': f"Reward for violation {violation_id}",
+                    'balance_after': balances[reporter_id],
+                })
+            WalletTransaction.record_transactions(records)
+            
+            cls.objects.filter(pk__in=[pk for pk, _, _, _ in rewards]).update(
+                reward_paid=True, reward_paid_at=now
+            )
+            cls.objects.filter(pk__in=pks).update(status=ViolationStatus.PAYMENT_RECEIVED, updated_at=now)
+        
+        return len(pks)
 
 
 class ViolationMedia(models.Model):
@@ -184,6 +415,8 @@ class ViolationMedia(models.Model):
     
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    objects = ViolationMediaManager()
+    
     class Meta:
         db_table = 'violations_violation_media'
         ordering = ['violation', 'uploaded_at']
@@ -209,6 +442,8 @@ class ViolationComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ViolationCommentManager()
+    
     class Meta:
         db_table = 'violations_violation_comment'
         ordering = ['-created_at']
@@ -236,6 +471,11 @@ class Challan(models.Model):
     violation = models.OneToOneField(Violation, on_delete=models.CASCADE, related_name='challan')
     challan_number = models.CharField(max_length=50, unique=True)
     
+    # Violation fields copied at issue time so challan listings don't join violations
+    vehicle_number_snapshot = models.CharField(max_length=20, blank=True, editable=False)
+    city_snapshot = models.CharField(max_length=100, blank=True, editable=False)
+    violation_type_code_snapshot = models.CharField(max_length=20, blank=True, editable=False)
+    
     # Vehicle owner details (from MoRTH API)
     owner_name = models.CharField(max_length=200)
     owner_address = models.TextField()
@@ -266,18 +506,33 @@ class Challan(models.Model):
             models.Index(fields=['challan_number']),
             models.Index(fields=['status']),
             models.Index(fields=['due_date']),
+            # Only unpaid challans are scanned by due date
+            models.Index(
+                fields=['due_date'],
+                name='challan_open_due_idx',
+                condition=Q(status__in=['issued', 'overdue'])
+            ),
         ]
     
     def __str__(self):
-        return f"Challan {self.challan_number} - {self.violation.vehicle_number}"
+        return f"Challan {self.challan_number} - {self.vehicle_number_snapshot}"
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.vehicle_number_snapshot = self.violation.vehicle_number
+            self.city_snapshot = self.violation.city
+            self.violation_type_code_snapshot = get_violation_type(self.violation.violation_type_id).code
+        super().save(*args, **kwargs)
     
     def mark_paid(self):
         """Mark challan as paid and trigger reward payment"""
         self.status = 'paid'
         self.paid_at = timezone.now()
-        self.save()
+        self.save(update_fields=['status', 'paid_at', 'updated_at'])
         
-        # Update violation status and pay reward
+        # Update violation status and pay reward; the violation, its type and
+        # reporter come back in one query instead of three lazy loads
+        self.violation = Violation.objects.get(pk=self.violation_id)
         self.violation.mark_payment_received()
 
 
@@ -307,3 +562,30 @@ class Statistics(models.Model):
     class Meta:
         db_table = 'violations_statistics'
         ordering = ['-date']
+    
+    @classmethod
+    def rebuild_for(cls, date):
+        """Recompute a day's statistics with one conditional aggregate per table"""
+        violations = Violation.objects.filter(
+            Q(created_at__date=date) | Q(reward_paid_at__date=date)
+        ).aggregate(
+            total_violations=Count('id', filter=Q(created_at__date=date)),
+            pending_violations=Count('id', filter=Q(created_at__date=date, status=ViolationStatus.PENDING)),
+            approved_violations=Count('id', filter=Q(created_at__date=date, status=ViolationStatus.APPROVED)),
+            rejected_violations=Count('id', filter=Q(created_at__date=date, status=ViolationStatus.REJECTED)),
+            total_rewards_paid=Sum(
+                'reward_amount', filter=Q(reward_paid=True, reward_paid_at__date=date), default=Decimal('0')
+            ),
+        )
+        challans = Challan.objects.filter(
+            Q(issued_at__date=date) | Q(paid_at__date=date)
+        ).aggregate(
+            challans_issued=Count('id', filter=Q(issued_at__date=date)),
+            challans_paid=Count('id', filter=Q(status='paid', paid_at__date=date)),
+            total_fines_collected=Sum(
+                'total_amount', filter=Q(status='paid', paid_at__date=date), default=Decimal('0')
+            ),
+        )
+        
+        stats, _ = cls.objects.update_or_create(date=date, defaults={**violations, **challans})
+        return stats
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from .models import Violation, ViolationStatus
+
+
+class ViolationStatusField(serializers.ChoiceField):
+    """
+    Violation status as its lowercase name ('pending', 'challan_issued', ...) on the wire,
+    stored as the ViolationStatus code
+    """
+    def __init__(self, **kwargs):
+        super().__init__(choices=[(status.slug, status.label) for status in ViolationStatus], **kwargs)
+
+    def to_representation(self, value):
+        return ViolationStatus(value).slug
+
+    def to_internal_value(self, data):
+        return ViolationStatus[super().to_internal_value(data).upper()]
+
+
+class ViolationSerializer(serializers.ModelSerializer):
+    """
+    Violation card as listed to reporters and officers
+    """
+    status = ViolationStatusField(read_only=True)
+
+    class Meta:
+        model = Violation
+        fields = (
+            'id', 'violation_id', 'status', 'vehicle_number', 'city', 'state', 'occurred_at',
+            'violation_type', 'reward_amount', 'created_at'
+        )
+        read_only_fields = fields
@@ -0,0 +1,10 @@
+from celery import shared_task
+from django.core.management import call_command
+
+
+@shared_task
+def check_snapshot_consistency():
+    """
+    Nightly repair of challan snapshots that drifted from their violations
+    """
+    call_command('check_snapshot_consistency', fix=True)
@@ -0,0 +1,205 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.authentication.models import WalletTransaction
+
+from .models import Violation, ViolationStatus, ViolationType, _announce_violation_type_change, get_violation_type
+from .serializers import ViolationSerializer, ViolationStatusField
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_reporter(username, phone_number, wallet_balance='0.00'):
+    return get_user_model().objects.create_user(
+        username=username, phone_number=phone_number, email=f'{username}@example.com',
+        password='s3cret-pass', wallet_balance=Decimal(wallet_balance)
+    )
+
+
+def create_violation_type(code, fine_amount):
+    return ViolationType.objects.create(
+        name=code.replace('_', ' ').title(), code=code, description=code, fine_amount=Decimal(fine_amount)
+    )
+
+
+def create_violation(reporter, violation_type, **fields):
+    return Violation.objects.create(
+        reporter=reporter, violation_type=violation_type, description='Reported from the app',
+        latitude=18.52, longitude=73.85, location_address='FC Road', city='Pune', state='Maharashtra',
+        pincode='411004', occurred_at=timezone.now(), **fields
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ViolationTypeTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.violation_type = ViolationType.objects.create(
+            name='Riding without helmet', code='NO_HELMET', description='Rider without a helmet',
+            fine_amount=Decimal('1000.00')
+        )
+
+    def test_lookups_are_served_from_memory(self):
+        get_violation_type(self.violation_type.pk)
+        with self.assertNumQueries(0):
+            info = get_violation_type(self.violation_type.pk)
+        self.assertEqual((info.code, info.fine_amount), ('NO_HELMET', Decimal('1000.00')))
+
+    def test_change_announced_by_another_process_reloads_table(self):
+        get_violation_type(self.violation_type.pk)
+        # What another worker's save() amounts to here: new rows plus a new shared version
+        ViolationType.objects.filter(pk=self.violation_type.pk).update(fine_amount=Decimal('1500.00'))
+        _announce_violation_type_change()
+        self.assertEqual(get_violation_type(self.violation_type.pk).fine_amount, Decimal('1500.00'))
+
+    def test_save_announces_change_on_commit(self):
+        get_violation_type(self.violation_type.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.violation_type.fine_amount = Decimal('2000.00')
+            self.violation_type.save()
+        self.assertEqual(get_violation_type(self.violation_type.pk).fine_amount, Decimal('2000.00'))
+
+    def test_new_type_is_found_before_its_change_is_announced(self):
+        get_violation_type(self.violation_type.pk)
+        new_type = ViolationType.objects.create(
+            name='Signal jumping', code='RED_LIGHT', description='Crossed on red', fine_amount=Decimal('500.00')
+        )
+        self.assertEqual(get_violation_type(new_type.pk).fine_amount, Decimal('500.00'))
+
+    def test_cache_flush_reloads_table(self):
+        get_violation_type(self.violation_type.pk)
+        ViolationType.objects.filter(pk=self.violation_type.pk).update(fine_amount=Decimal('750.00'))
+        cache.clear()
+        self.assertEqual(get_violation_type(self.violation_type.pk).fine_amount, Decimal('750.00'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ViolationStatusSerializationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.violation = create_violation(
+            create_reporter('reporter', '9876543210'), create_violation_type('NO_HELMET', '1000.00'),
+            status=ViolationStatus.CHALLAN_ISSUED
+        )
+
+    def test_status_serialized_as_slug(self):
+        self.assertEqual(ViolationSerializer(self.violation).data['status'], 'challan_issued')
+        self.assertEqual(self.violation.status_slug, 'challan_issued')
+
+    def test_every_status_round_trips(self):
+        field = ViolationStatusField()
+        for status in ViolationStatus:
+            self.assertEqual(field.to_internal_value(field.to_representation(status.value)), status)
+
+    def test_rejects_integer_codes(self):
+        with self.assertRaises(serializers.ValidationError):
+            ViolationStatusField().to_internal_value('4')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkReviewAndPayoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.officer = create_reporter('officer', '9876500000')
+        self.reporter = create_reporter('reporter', '9876543210', wallet_balance='50.00')
+        self.other_reporter = create_reporter('other', '9123456780')
+        self.no_helmet = create_violation_type('NO_HELMET', '1000.00')
+        self.red_light = create_violation_type('RED_LIGHT', '500.00')
+
+    def approved(self, reporter, violation_type, **fields):
+        violation = create_violation(reporter, violation_type, **fields)
+        violation.approve(self.officer)
+        return violation
+
+    def test_bulk_approve_computes_rounded_rewards(self):
+        odd_fine = create_violation_type('ODD_FINE', '333.33')
+        violations = [
+            create_violation(self.reporter, self.no_helmet),
+            create_violation(self.reporter, odd_fine, status=ViolationStatus.UNDER_REVIEW),
+        ]
+        approved = Violation.bulk_approve(Violation.objects.all(), self.officer, 'Clear evidence')
+        
+        self.assertEqual(approved, 2)
+        for violation, reward in zip(violations, [Decimal('400.00'), Decimal('133.33')]):
+            violation.refresh_from_db()
+            self.assertEqual(violation.status, ViolationStatus.APPROVED)
+            self.assertEqual(violation.reward_amount, reward)
+            self.assertEqual(violation.reviewed_by, self.officer)
+            self.assertIsNotNone(violation.reviewed_at)
+
+    def test_bulk_approve_skips_reviewed_violations(self):
+        rejected = create_violation(self.reporter, self.no_helmet, status=ViolationStatus.REJECTED)
+        paid = self.approved(self.reporter, self.no_helmet)
+        Violation.bulk_mark_paid(Violation.objects.filter(pk=paid.pk))
+        
+        self.assertEqual(Violation.bulk_approve(Violation.objects.all(), self.officer), 0)
+        rejected.refresh_from_db()
+        self.assertEqual((rejected.status, rejected.reward_amount), (ViolationStatus.REJECTED, 0))
+        paid.refresh_from_db()
+        self.assertEqual(paid.status, ViolationStatus.PAYMENT_RECEIVED)
+
+    def test_approve_leaves_reviewed_violation_unchanged(self):
+        violation = create_violation(self.reporter, self.no_helmet, status=ViolationStatus.REJECTED)
+        violation.approve(self.officer)
+        self.assertEqual((violation.status, violation.reward_amount), (ViolationStatus.REJECTED, 0))
+
+    def test_bulk_mark_paid_credits_each_reporter_once(self):
+        first = self.approved(self.reporter, self.no_helmet)
+        second = self.approved(self.reporter, self.red_light, status=ViolationStatus.UNDER_REVIEW)
+        third = self.approved(self.other_reporter, self.red_light)
+        third.issue_challan()
+        
+        self.assertEqual(Violation.bulk_mark_paid(Violation.objects.all()), 3)
+        
+        self.reporter.refresh_from_db()
+        self.other_reporter.refresh_from_db()
+        self.assertEqual(self.reporter.wallet_balance, Decimal('650.00'))
+        self.assertEqual(self.other_reporter.wallet_balance, Decimal('200.00'))
+        
+        records = WalletTransaction.objects.filter(user=self.reporter).order_by('pk')
+        self.assertEqual(
+            [(r.amount, r.balance_after, r.description) for r in records],
+            [
+                (Decimal('400.00'), Decimal('450.00'), f"Reward for violation {first.violation_id}"),
+                (Decimal('200.00'), Decimal('650.00'), f"Reward for violation {second.violation_id}"),
+            ]
+        )
+        self.assertEqual(
+            list(WalletTransaction.objects.filter(user=self.other_reporter).values_list('balance_after', flat=True)),
+            [Decimal('200.00')]
+        )
+        
+        for violation in (first, second, third):
+            violation.refresh_from_db()
+            self.assertEqual(violation.status, ViolationStatus.PAYMENT_RECEIVED)
+            self.assertTrue(violation.reward_paid)
+            self.assertIsNotNone(violation.reward_paid_at)
+
+    def test_bulk_mark_paid_does_not_pay_twice(self):
+        self.approved(self.reporter, self.no_helmet)
+        Violation.bulk_mark_paid(Violation.objects.all())
+        
+        self.assertEqual(Violation.bulk_mark_paid(Violation.objects.all()), 0)
+        self.reporter.refresh_from_db()
+        self.assertEqual(self.reporter.wallet_balance, Decimal('450.00'))
+        self.assertEqual(WalletTransaction.objects.filter(user=self.reporter).count(), 1)
+
+    def test_bulk_mark_paid_skips_unapproved_violations(self):
+        pending = create_violation(self.reporter, self.no_helmet, reward_amount=Decimal('400.00'))
+        rejected = create_violation(self.reporter, self.no_helmet, status=ViolationStatus.REJECTED)
+        approved = self.approved(self.reporter, self.red_light)
+        
+        self.assertEqual(Violation.bulk_mark_paid(Violation.objects.all()), 1)
+        
+        self.reporter.refresh_from_db()
+        self.assertEqual(self.reporter.wallet_balance, Decimal('250.00'))
+        for violation, status in ((pending, ViolationStatus.PENDING), (rejected, ViolationStatus.REJECTED)):
+            violation.refresh_from_db()
+            self.assertEqual((violation.status, violation.reward_paid), (status, False))
+        approved.refresh_from_db()
+        self.assertEqual(approved.status, ViolationStatus.PAYMENT_RECEIVED)
@@ -2,18 +2,25 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, permission_classes
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from .models import ViolationType
+from django.core.cache import cache
+from .models import VIOLATION_TYPES_CACHE_KEY, ViolationType
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def violation_types_list(request):
+async def violation_types_list(request):
     """
     Get all available violation types
     """
-    violation_types = ViolationType.objects.all().values(
-        'id', 'name', 'code', 'description', 'fine_amount'
-    )
-    return Response(list(violation_types))
+    violation_types = await cache.aget(VIOLATION_TYPES_CACHE_KEY)
+    if violation_types is None:
+        violation_types = [
+            violation_type async for violation_type in ViolationType.objects.filter(is_active=True).values(
+                'id', 'name', 'code', 'description', 'fine_amount'
+            )
+        ]
+        await cache.aset(VIOLATION_TYPES_CACHE_KEY, violation_types, 60 * 60)
+    return Response(violation_types)
@@ -1,4 +1,4 @@
-from apps.violations.models import ViolationType
+from apps.violations.models import ViolationType, invalidate_violation_type_cache
 
 violation_types = [
     {'name': 'Speeding', 'code': 'SP001', 'description': 'Driving above speed limit', 'fine_amount': 500.00, 'ai_detectable': True},
@@ -11,11 +11,17 @@ violation_types = [
     {'name': 'Triple Riding', 'code': 'TR001', 'description': 'More than 2 people on motorcycle', 'fine_amount': 500.00, 'ai_detectable': True}
 ]
 
-for vt_data in violation_types:
-    obj, created = ViolationType.objects.get_or_create(code=vt_data['code'], defaults=vt_data)
-    if created:
-        print(f'Created: {obj.name}')
-    else:
-        print(f'Already exists: {obj.name}')
+# One INSERT for all rows; existing codes are skipped by the unique constraint
+existing = ViolationType.objects.count()
+ViolationType.objects.bulk_create(
+    [ViolationType(**vt_data) for vt_data in violation_types],
+    ignore_conflicts=True,
+    batch_size=500
+)
 
-print(f'Total violation types: {ViolationType.objects.count()}')
+# bulk_create sends no post_save, so clear the cached type table/list here
+invalidate_violation_type_cache(sender=ViolationType)
+
+total = ViolationType.objects.count()
+print(f'Created: {total - existing}')
+print(f'Total violation types: {total}')
@@ -0,0 +1,12 @@
+"""
+Celery application for snapchallan project.
+"""
+
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'snapchallan.settings')
+
+app = Celery('snapchallan')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,45 @@
+"""
+Middleware for snapchallan project.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+
+from .views import health_payload
+
+HEALTH_CHECK_PATH = '/health/'
+
+
+class HealthCheckMiddleware:
+    """
+    Answer load balancer health probes before the rest of the middleware stack
+    and URL resolution run
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.is_health_check(request):
+            return self.health_response()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.is_health_check(request):
+            return self.health_response()
+        return await self.get_response(request)
+
+    @staticmethod
+    def is_health_check(request):
+        return request.method == 'GET' and request.path_info == HEALTH_CHECK_PATH
+
+    @staticmethod
+    def health_response():
+        return HttpResponse(health_payload(), content_type='application/json')
@@ -1,34 +1,46 @@
-from django.http import JsonResponse
+from django.http import HttpResponse
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt
+from datetime import datetime, timezone
 import json
 
+# Static response bodies, encoded once at import
+_HOME_PAYLOAD = json.dumps({
+    'message': 'Welcome to SnapChallan API',
+    'version': '1.0.0',
+    'status': 'running',
+    'endpoints': {
+        'admin': '/admin/',
+        'authentication': '/api/auth/',
+        'violations': '/api/violations/',
+        'payments': '/api/payments/',
+        'ai_processing': '/api/ai/',
+        'officers': '/api/officers/',
+        'notifications': '/api/notifications/',
+    }
+}, separators=(',', ':')).encode()
+
+_HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+_HEALTH_SUFFIX = b'"}'
+
+
+def health_payload() -> bytes:
+    """
+    Health check body with the current UTC time spliced into the pre-encoded JSON
+    """
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ').encode()
+    return _HEALTH_PREFIX + timestamp + _HEALTH_SUFFIX
+
+
 @require_http_methods(["GET"])
 def home_view(request):
     """
     Home page view - provides basic API information
     """
-    return JsonResponse({
-        'message': 'Welcome to SnapChallan API',
-        'version': '1.0.0',
-        'status': 'running',
-        'endpoints': {
-            'admin': '/admin/',
-            'authentication': '/api/auth/',
-            'violations': '/api/violations/',
-            'payments': '/api/payments/',
-            'ai_processing': '/api/ai/',
-            'officers': '/api/officers/',
-            'notifications': '/api/notifications/',
-        }
-    })
+    return HttpResponse(_HOME_PAYLOAD, content_type='application/json')
 
 @require_http_methods(["GET"])
 def health_check(request):
     """
     Health check endpoint
     """
-    return JsonResponse({
-        'status': 'healthy',
-        'timestamp': '2025-07-16T12:34:00Z'
-    })
+    return HttpResponse(health_payload(), content_type='application/json')
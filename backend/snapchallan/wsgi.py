@@ -4,7 +4,13 @@ WSGI config for snapchallan project.
 
 import os
 from django.core.wsgi import get_wsgi_application
+from django.db import connections
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'snapchallan.settings')
 
 application = get_wsgi_application()
+
+# With persistent connections (CONN_MAX_AGE) a connection opened while the app is
+# preloaded (gunicorn --preload) would be inherited by every forked worker and
+# share one socket. Close it in the parent right before each fork instead.
+os.register_at_fork(before=connections.close_all)